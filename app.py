@@ -1,15 +1,33 @@
 import time
-import faker
+
+# marca o início da execução do script para medir o tempo até a primeira renderização
+_INICIO = time.perf_counter()
+
+import os
+import atexit
 import random
-import pandas as pd
 from uuid import UUID
-import networkx as nx
 import streamlit as st
 from src.bloco import Bloco
-from src.usuario import Usuario
-import plotly.graph_objects as go
+from src.usuario import Usuario, abrir_rede
 from src.transacao import Transacao
 from src.blockchain import Blockchain
+from src.estado import GerenciadorSnapshots
+from src.registro import RegistroCircular
+from src.colunas import como_bytes
+
+# as dependências pesadas (pandas, plotly, networkx e faker) são importadas
+# dentro das páginas que as usam, para que cada página só as carregue ao ser aberta
+
+# últimas linhas do log de consenso mantidas e taxa máxima de atualização da tela
+CAPACIDADE_LOG = 500
+QUADROS_POR_SEGUNDO_LOG = 10
+
+# diretório onde as capturas de perfil de desempenho são gravadas
+DIRETORIO_PERFIS = "perfis"
+
+# arquivo opcional da cadeia; com ele, a rede é reaberta a partir do último snapshot
+ARQUIVO_CADEIA = os.environ.get("BLOCKCHAIN_ARQUIVO")
 
 st.set_page_config(
     page_title="Blockchain",
@@ -19,25 +37,52 @@ st.set_page_config(
 )
 
 
+@st.cache_resource(show_spinner="Criando a rede de demonstração...")
+def rede_compartilhada(quantidade: int = 10):
+    """
+    Cria a blockchain de demonstração e seus usuários uma única vez por processo.
+    Todas as sessões do navegador compartilham a mesma instância, cujo acesso
+    concorrente é coordenado pela trava de leitura/escrita da blockchain.
+    Com `ARQUIVO_CADEIA`, reabre a cadeia e os usuários gravados, restaurando
+    os saldos do último snapshot, e só cria usuários se a cadeia for nova.
+    """
+    import faker
+
+    if ARQUIVO_CADEIA is None:
+        blockchain = Blockchain()
+    else:
+        snapshots = GerenciadorSnapshots(ARQUIVO_CADEIA + ".snapshots")
+        blockchain, usuarios = abrir_rede(ARQUIVO_CADEIA, snapshots)
+    # encerra os processos de mineração e grava o estado derivado da cadeia em arquivo,
+    # para que a próxima abertura seja incremental
+    atexit.register(blockchain.fechar)
+    if ARQUIVO_CADEIA is not None and usuarios:
+        return blockchain, usuarios
+
+    fake = faker.Faker("pt_BR")
+    usuarios = [
+        Usuario(fake.name(), blockchain, random.uniform(10, 100))
+        for _ in range(quantidade)
+    ]
+    return blockchain, usuarios
+
+
 def iniciar_demo():
     """Inicia a demonstração da blockchain com dados de exemplo"""
     if "blockchain" not in st.session_state:
-        st.session_state.blockchain = Blockchain()
-
-        fake = faker.Faker("pt_BR")
-        st.session_state.usuarios = []
-        for _ in range(10):
-            nome = fake.name()
-            usuario = Usuario(
-                nome, st.session_state.blockchain, random.uniform(10, 100)
-            )
-            st.session_state.usuarios.append(usuario)
+        blockchain, usuarios = rede_compartilhada()
+        st.session_state.blockchain = blockchain
+        st.session_state.usuarios = usuarios
 
         st.session_state.transacoes_pendentes = []
+        st.session_state.blocos_falhos = []
 
 
 def exibir_blockchain():
     """Visualiza a cadeia de blocos e informações detalhadas"""
+    import pandas as pd
+    import plotly.graph_objects as go
+
     st.subheader("Blockchain")
 
     blockchain = st.session_state.blockchain
@@ -46,43 +91,32 @@ def exibir_blockchain():
         st.info("Apenas o bloco gênesis existe na cadeia.")
         return
 
-    dados_blocos = []
-    for i, bloco in enumerate(blockchain.cadeia):
-        nome_minerador = "Sistema"
-        nome_remetente = "Sistema"
-        nome_destinatario = "Sistema"
-
-        if bloco.minerador != UUID(int=0):
-            for usuario in st.session_state.usuarios:
-                if usuario.id == bloco.minerador:
-                    nome_minerador = usuario.nome
-                    break
-
-        if bloco.transacao.remetente != UUID(int=0):
-            for usuario in st.session_state.usuarios:
-                if usuario.id == bloco.transacao.remetente:
-                    nome_remetente = usuario.nome
-                    break
-
-        if bloco.transacao.destinatario != UUID(int=0):
-            for usuario in st.session_state.usuarios:
-                if usuario.id == bloco.transacao.destinatario:
-                    nome_destinatario = usuario.nome
-                    break
-
-        dados_blocos.append(
-            {
-                "Índice": i,
-                "ID do Bloco": str(bloco.id)[:8] + "...",
-                "Minerador": nome_minerador,
-                "Transação": f"{nome_remetente} → {nome_destinatario}",
-                "Pontos": f"{bloco.transacao.pontos:.2f}" if i > 0 else "N/A",
-                "Timestamp": bloco.timestamp.strftime("%H:%M:%S"),
-                "Hash": bloco.hash.hex()[:16] + "..." if bloco.hash else "N/A",
-            }
-        )
+    colunas = blockchain.colunas()
+    nomes = {usuario.id.bytes: usuario.nome for usuario in st.session_state.usuarios}
+
+    minerador = pd.Series(como_bytes(colunas["minerador"])).map(nomes).fillna("Sistema")
+    remetente = pd.Series(como_bytes(colunas["remetente"])).map(nomes).fillna("Sistema")
+    destinatario = pd.Series(como_bytes(colunas["destinatario"])).map(nomes).fillna("Sistema")
+    pontos = pd.Series(colunas["pontos"]).map("{:.2f}".format)
+    pontos.iloc[0] = "N/A"
+    hashes = [
+        h.hex()[:16] + "..." if valido else "N/A"
+        for h, valido in zip(como_bytes(colunas["hash"]), colunas["hash_valido"])
+    ]
 
-    df = pd.DataFrame(dados_blocos)
+    df = pd.DataFrame(
+        {
+            "Índice": colunas["altura"],
+            "ID do Bloco": [b.hex()[:8] + "..." for b in como_bytes(colunas["id_bloco"])],
+            "Minerador": minerador,
+            "Transação": remetente + " → " + destinatario,
+            "Pontos": pontos,
+            "Timestamp": pd.to_datetime(colunas["timestamp"], unit="us").strftime(
+                "%H:%M:%S"
+            ),
+            "Hash": hashes,
+        }
+    )
     st.dataframe(df, use_container_width=True, hide_index=True)
 
     st.subheader("Visualização da Blockchain")
@@ -190,6 +224,11 @@ def criar_e_minerar_transacao():
     Interface para criar e minerar um bloco com uma transação.
     """
     st.subheader("Criar e Minerar Transação")
+
+    resultado = st.session_state.pop("resultado_mineracao", None)
+    if resultado is not None:
+        exibir_resultado_mineracao(resultado)
+
     col1, col2 = st.columns([1, 1])
 
     with col1:
@@ -238,63 +277,79 @@ def criar_e_minerar_transacao():
             return
 
         try:
-            with st.container():
-                st.subheader("Processo de Mineração e Consenso")
-
-                st.info(
-                    f"**Transação:** {remetente.nome} → {destinatario.nome} | **Valor:** {pontos:.2f} pontos"
-                )
+            st.subheader("Processo de Mineração e Consenso")
+            st.info(
+                f"**Transação:** {remetente.nome} → {destinatario.nome} | **Valor:** {pontos:.2f} pontos"
+            )
 
-                log_container = st.empty()
-                logs = []
+            # cada quadro acrescenta apenas as linhas novas ao log, sem redesenhar as anteriores
+            caixa_log = st.container(height=500)
+            registro = RegistroCircular(
+                lambda linhas: caixa_log.text("\n".join(linhas)),
+                capacidade=CAPACIDADE_LOG,
+                quadros_por_segundo=QUADROS_POR_SEGUNDO_LOG,
+            )
 
-                def log_callback(message):
-                    logs.append(message)
-                    log_text = "\n".join(logs)
-                    log_container.text_area(
-                        "Log do Processo:", value=log_text, height=500, disabled=True
-                    )
+            transacao = remetente.criar_transacao(destinatario.id, pontos)
+            bloco = remetente.minerar_bloco(transacao, registro)
+            registro.descarregar()
+
+            if bloco:
+                st.session_state.blockchain.verificar()
+
+            st.session_state.resultado_mineracao = {
+                "bloco_id": str(bloco.id) if bloco else None,
+                "remetente": remetente.nome,
+                "destinatario": destinatario.nome,
+                "saldo_remetente": remetente.pontos,
+                "saldo_destinatario": destinatario.pontos,
+                "log": list(registro.linhas),
+                "descartadas": registro.total - len(registro.linhas),
+            }
+        except Exception as e:
+            st.session_state.resultado_mineracao = {"erro": e}
 
-                transacao = remetente.criar_transacao(destinatario.id, pontos)
-                bloco = remetente.minerar_bloco(transacao, log_callback)
+        st.rerun()
 
-                if bloco:
-                    st.success(
-                        f"Transação concluída com sucesso! Bloco ID: {str(bloco.id)[:8]}..."
-                    )
 
-                    st.subheader("Sumário Final")
-                    col1, col2 = st.columns(2)
+def exibir_resultado_mineracao(resultado: dict):
+    """Exibe o sumário da última mineração, guardado antes do rerun da página."""
+    if "erro" in resultado:
+        st.error(f"Erro ao processar transação: {str(resultado['erro'])}")
+        st.exception(resultado["erro"])
+        return
 
-                    with col1:
-                        st.metric("Status", "Sucesso")
-                        st.metric("Bloco ID", str(bloco.id)[:8])
+    if resultado["bloco_id"]:
+        st.success(
+            f"Transação concluída com sucesso! Bloco ID: {resultado['bloco_id'][:8]}..."
+        )
 
-                    with col2:
-                        st.metric("Novo saldo - Remetente", f"{remetente.pontos:.2f}")
-                        st.metric(
-                            "Novo saldo - Destinatário", f"{destinatario.pontos:.2f}"
-                        )
+        st.subheader("Sumário Final")
+        col1, col2 = st.columns(2)
 
-                    st.session_state.blockchain.verificar()
-                else:
-                    st.error("Transação falhou - Bloco rejeitado pela rede")
-                    st.subheader("Sumário da Falha")
-                    st.warning("A transação não foi aprovada pelo consenso da rede.")
+        with col1:
+            st.metric("Status", "Sucesso")
+            st.metric("Bloco ID", resultado["bloco_id"][:8])
 
-            time.sleep(10)
-            st.rerun()
+        with col2:
+            st.metric("Novo saldo - Remetente", f"{resultado['saldo_remetente']:.2f}")
+            st.metric("Novo saldo - Destinatário", f"{resultado['saldo_destinatario']:.2f}")
+    else:
+        st.error("Transação falhou - Bloco rejeitado pela rede")
+        st.subheader("Sumário da Falha")
+        st.warning("A transação não foi aprovada pelo consenso da rede.")
 
-        except Exception as e:
-            st.error(f"Erro ao processar transação: {str(e)}")
-            st.exception(e)
-            time.sleep(5)
-            st.rerun()
+    with st.expander("Log do Processo"):
+        if resultado["descartadas"]:
+            st.caption(f"{resultado['descartadas']} linhas mais antigas foram descartadas.")
+        st.text("\n".join(resultado["log"]))
 
 
 def criar_bloco_falho():
     """
     Cria um bloco falho para testar a verificação da blockchain.
+    A cadeia é compartilhada por todas as sessões, então o bloco fica apenas
+    na sessão atual e é verificado como se estivesse no fim da cadeia.
     """
     transacao = Transacao(remetente=UUID(int=2), destinatario=UUID(int=3), pontos=5.0)
 
@@ -302,11 +357,37 @@ def criar_bloco_falho():
         transacao=transacao, hash_anterior=UUID(int=0).bytes, minerador=UUID(int=1)
     )
 
-    st.session_state.blockchain.cadeia.append(bloco)
+    st.session_state.blocos_falhos.append(bloco)
+
+
+def desenhar_comunidade(visao, usuarios):
+    """
+    Calcula o layout do grafo da comunidade e as coordenadas das arestas.
+    Retorna as posições por ID de usuário e as listas x e y das linhas das arestas.
+    """
+    import networkx as nx
+
+    nos = [str(usuario_id) for usuario_id in visao.nos]
+    G = nx.Graph()
+    G.add_nodes_from(str(usuario.id) for usuario in usuarios)
+    G.add_nodes_from(nos)
+    G.add_edges_from((nos[a], nos[b]) for a, b in zip(visao.origem, visao.destino))
+    pos = nx.spring_layout(G, k=3, iterations=50)
+
+    edge_x = []
+    edge_y = []
+    for a, b in zip(visao.origem, visao.destino):
+        x0, y0 = pos[nos[a]]
+        x1, y1 = pos[nos[b]]
+        edge_x.extend([x0, x1, None])
+        edge_y.extend([y0, y1, None])
+    return pos, edge_x, edge_y
 
 
 def exibir_comunidade():
     """Visualiza o grafo de relacionamento da comunidade e informações dos usuários"""
+    import pandas as pd
+    import plotly.graph_objects as go
 
     blockchain = st.session_state.blockchain
 
@@ -315,31 +396,21 @@ def exibir_comunidade():
     if not blockchain.comunidade:
         st.info("Nenhuma transação registrada. O grafo está vazio.")
     else:
-        # cria grafo da relação entre os usuários
-        G = nx.Graph()
-
-        for usuario in st.session_state.usuarios:
-            status = "ativo" if usuario.id in blockchain.usuarios_por_id else "banido"
-            cor = "black" if status == "ativo" else "red"
-            G.add_node(str(usuario.id), label=usuario.nome, color=cor, status=status)
+        with blockchain.trava.leitura():
+            visao = blockchain.comunidade.visao()
+            ativos = {str(usuario_id) for usuario_id in blockchain.usuarios_por_id}
+        usuarios = st.session_state.usuarios
 
-        for remetente, destinatarios in blockchain.comunidade.items():
-            for destinatario in destinatarios:
-                if remetente != UUID(int=0):
-                    G.add_edge(str(remetente), str(destinatario))
-
-        if len(G.edges()) == 0:
+        if len(visao) == 0:
             st.info("Nenhuma conexão entre usuários registradas.")
         else:
-            pos = nx.spring_layout(G, k=3, iterations=50)
-
-            edge_x = []
-            edge_y = []
-            for edge in G.edges():
-                x0, y0 = pos[edge[0]]
-                x1, y1 = pos[edge[1]]
-                edge_x.extend([x0, x1, None])
-                edge_y.extend([y0, y1, None])
+            # o layout e as coordenadas das arestas só são recalculados quando
+            # o grafo gera uma nova visão ou entram novos usuários
+            desenho = st.session_state.get("desenho_comunidade")
+            if desenho is None or desenho[0] is not visao or desenho[1] != len(usuarios):
+                desenho = (visao, len(usuarios), desenhar_comunidade(visao, usuarios))
+                st.session_state.desenho_comunidade = desenho
+            pos, edge_x, edge_y = desenho[2]
 
             edge_trace = go.Scatter(
                 x=edge_x,
@@ -360,24 +431,16 @@ def exibir_comunidade():
             node_text_banido = []
             node_info_banido = []
 
-            for node in G.nodes():
-                x, y = pos[node]
-
-                nome = "Desconhecido"
-                status = "ativo"
-                for usuario in st.session_state.usuarios:
-                    if str(usuario.id) == node:
-                        nome = usuario.nome
-                        status = (
-                            "ativo"
-                            if usuario.id in blockchain.usuarios_por_id
-                            else "banido"
-                        )
-                        break
+            nomes = {str(usuario.id): usuario.nome for usuario in usuarios}
+            graus = {str(usuario_id): int(grau) for usuario_id, grau in zip(visao.nos, visao.grau)}
+            for node, (x, y) in pos.items():
+                nome = nomes.get(node, "Desconhecido")
+                status = "ativo" if node in ativos or node not in nomes else "banido"
 
                 node_text = nome
                 node_info = (
                     f"Usuário: {nome}<br>ID: {node[:8]}...<br>Status: {status.title()}"
+                    f"<br>Conexões: {graus.get(node, 0)}"
                 )
 
                 if status == "ativo":
@@ -567,6 +630,36 @@ def exibir_comunidade():
             st.info("Nenhum usuário banido para desbanir.")
 
 
+def exibir_controle_perfil():
+    """
+    Ativa a captura de perfil (cProfile e tracemalloc) das próximas chamadas
+    a `adicionar_bloco` e `verificar`, gravando os resultados em DIRETORIO_PERFIS.
+    """
+    from src.perfil import capturar_perfil
+
+    captura = st.session_state.get("captura_perfil")
+    if captura is not None and captura.ativa:
+        st.caption(f"Capturando: {captura.restantes} chamada(s) restante(s)")
+        if st.button("Cancelar captura"):
+            captura.desativar()
+            st.rerun()
+        return
+
+    chamadas = st.number_input("Chamadas a capturar", min_value=1, max_value=50, value=1)
+    if st.button("Capturar próximas chamadas"):
+        try:
+            st.session_state.captura_perfil = capturar_perfil(
+                st.session_state.blockchain, DIRETORIO_PERFIS, int(chamadas)
+            )
+            st.rerun()
+        except ValueError as e:
+            st.error(str(e))
+
+    if captura is not None and captura.arquivos:
+        st.caption("Últimos perfis gravados:")
+        st.text("\n".join(captura.arquivos[-6:]))
+
+
 def main():
     iniciar_demo()
 
@@ -583,18 +676,14 @@ def main():
 
     st.sidebar.markdown("---")
     st.sidebar.markdown("**Resumo da Rede:**")
-    usuarios_ativos = [
-        u
-        for u in st.session_state.usuarios
-        if u.id in st.session_state.blockchain.usuarios_por_id
-    ]
-    usuarios_banidos = len(st.session_state.usuarios) - len(usuarios_ativos)
-
-    st.sidebar.metric("Usuários Ativos", len(usuarios_ativos))
-    st.sidebar.metric("Usuários Banidos", usuarios_banidos)
+    metricas = st.session_state.blockchain.metricas()
 
-    total_pontos = sum(u.pontos for u in usuarios_ativos)
-    st.sidebar.metric("Total de Pontos", f"{total_pontos:.2f}")
+    st.sidebar.metric("Usuários Ativos", metricas.usuarios_ativos)
+    st.sidebar.metric("Usuários Banidos", metricas.usuarios_banidos)
+    st.sidebar.metric("Total de Pontos", f"{metricas.pontos_ativos:.2f}")
+    st.sidebar.metric("Transações", metricas.transacoes, help=f"Volume: {metricas.volume:.2f} pontos")
+    st.sidebar.metric("Aceitação do Consenso", f"{metricas.taxa_aceitacao:.0%}")
+    st.sidebar.metric("Latência Média dos Blocos", f"{metricas.latencia_media:.2f}s")
 
     pagina_id = paginas[pagina_selecionada]
 
@@ -609,7 +698,7 @@ def main():
     st.sidebar.markdown("---")
     if st.sidebar.button("Verificar Integridade"):
         try:
-            st.session_state.blockchain.verificar()
+            st.session_state.blockchain.verificar(st.session_state.blocos_falhos)
             st.sidebar.success("Blockchain íntegra!")
         except Exception as e:
             st.sidebar.error(f"Erro: {str(e)}")
@@ -617,6 +706,26 @@ def main():
     # cria bloco falho para dar erro na blockchain
     if st.sidebar.button("Destrutivo: Criar um bloco falho"):
         criar_bloco_falho()
+    if st.session_state.blocos_falhos:
+        st.sidebar.caption(
+            f"{len(st.session_state.blocos_falhos)} bloco(s) falho(s) nesta sessão"
+        )
+        if st.sidebar.button("Descartar blocos falhos"):
+            st.session_state.blocos_falhos = []
+            st.rerun()
+
+    with st.sidebar.expander("Perfil de desempenho"):
+        exibir_controle_perfil()
+
+    # tempo entre o início do script e o fim da primeira renderização da sessão
+    if "tempo_primeira_renderizacao" not in st.session_state:
+        st.session_state.tempo_primeira_renderizacao = time.perf_counter() - _INICIO
+        print(
+            f"Tempo até a primeira renderização: {st.session_state.tempo_primeira_renderizacao:.3f}s"
+        )
+    st.sidebar.caption(
+        f"Primeira renderização em {st.session_state.tempo_primeira_renderizacao:.2f}s"
+    )
 
 
 if __name__ == "__main__":
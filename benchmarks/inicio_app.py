@@ -0,0 +1,22 @@
+"""
+Mede o tempo até a primeira renderização do app, em um processo novo,
+e o tempo de uma segunda sessão, que reaproveita os recursos em cache.
+
+Uso: python -m benchmarks.inicio_app
+"""
+import time
+from streamlit.testing.v1 import AppTest
+
+
+def medir_sessao() -> float:
+    app = AppTest.from_file("../app.py", default_timeout=120)
+    inicio = time.perf_counter()
+    app.run()
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    print(f"Primeira sessão: {medir_sessao():.3f}s")
+    print(f"Segunda sessão: {medir_sessao():.3f}s")
@@ -0,0 +1,37 @@
+"""
+Mede a memória ocupada por bloco (bloco + transação assinados).
+
+Uso: python -m benchmarks.memoria_blocos [quantidade]
+"""
+import sys
+import tracemalloc
+from uuid import uuid4
+from src.bloco import Bloco
+from src.transacao import Transacao
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+def medir(quantidade: int) -> float:
+    chave = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    remetente, destinatario, minerador = uuid4(), uuid4(), uuid4()
+    hash_anterior = b"0" * 32
+
+    tracemalloc.start()
+    inicio, _ = tracemalloc.get_traced_memory()
+    blocos = []
+    for _ in range(quantidade):
+        transacao = Transacao(remetente=remetente, destinatario=destinatario, pontos=1.0)
+        transacao.assinar(chave)
+        bloco = Bloco(transacao=transacao, hash_anterior=hash_anterior, minerador=minerador)
+        bloco.assinar(chave)
+        hash_anterior = bloco.hash
+        blocos.append(bloco)
+    fim, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return (fim - inicio) / quantidade
+
+
+if __name__ == "__main__":
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{medir(quantidade):.0f} bytes por bloco ({quantidade} blocos)")
@@ -0,0 +1,82 @@
+"""
+Mede a memória residente da blockchain por bloco em duas alturas da cadeia,
+com a cadeia em arquivo e com poucos blocos residentes. Se os índices derivados
+ficam em disco, a diferença entre as duas medições não cresce com a cadeia.
+
+Uso: python -m benchmarks.memoria_cadeia [altura_menor] [altura_maior] [blocos_residentes]
+"""
+import gc
+import os
+import contextlib
+import sys
+import tempfile
+import tracemalloc
+from typing import List
+from src.bloco import Bloco
+from src.usuario import Usuario
+from src.transacao import Transacao
+from src.blockchain import Blockchain
+
+LOTE = 100
+
+
+def _lote(blockchain: Blockchain, usuarios: List[Usuario], quantidade: int) -> List[Bloco]:
+    """Cria blocos encadeados em que cada usuário minera a própria transferência."""
+    blocos = []
+    hash_anterior = blockchain.ultimo_bloco().hash
+    for i in range(quantidade):
+        remetente = usuarios[(len(blockchain.cadeia) + i) % 2]
+        destinatario = usuarios[(len(blockchain.cadeia) + i + 1) % 2]
+        transacao = Transacao(remetente=remetente.id, destinatario=destinatario.id, pontos=1.0)
+        transacao.assinar(remetente.chave_privada)
+        bloco = Bloco(transacao=transacao, hash_anterior=hash_anterior, minerador=remetente.id)
+        bloco.assinar(remetente.chave_privada)
+        hash_anterior = bloco.hash
+        blocos.append(bloco)
+    return blocos
+
+
+def _crescer_ate(blockchain: Blockchain, usuarios: List[Usuario], altura: int) -> None:
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        _importar_ate(blockchain, usuarios, altura)
+
+
+def _importar_ate(blockchain: Blockchain, usuarios: List[Usuario], altura: int) -> None:
+    while len(blockchain.cadeia) < altura:
+        quantidade = min(LOTE, altura - len(blockchain.cadeia))
+        sucesso, _, motivo = blockchain.adicionar_blocos(_lote(blockchain, usuarios, quantidade))
+        if not sucesso:
+            raise ValueError(f"Falha ao importar o lote: {motivo}")
+        # atualiza também o cache colunar e a análise, que crescem com a cadeia
+        blockchain.analise()
+
+
+def medir(altura_menor: int, altura_maior: int, blocos_residentes: int) -> float:
+    with tempfile.TemporaryDirectory() as diretorio:
+        blockchain = Blockchain(
+            arquivo_cadeia=os.path.join(diretorio, "cadeia.bin"),
+            blocos_residentes=blocos_residentes,
+        )
+        usuarios = [Usuario(f"usuario{i}", blockchain, 1_000_000.0) for i in range(2)]
+
+        tracemalloc.start()
+        _crescer_ate(blockchain, usuarios, altura_menor)
+        gc.collect()
+        memoria_menor, _ = tracemalloc.get_traced_memory()
+        _crescer_ate(blockchain, usuarios, altura_maior)
+        gc.collect()
+        memoria_maior, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{altura_menor} blocos: {memoria_menor / 1024:.1f} KiB")
+        print(f"{altura_maior} blocos: {memoria_maior / 1024:.1f} KiB")
+        blockchain.fechar()
+        return (memoria_maior - memoria_menor) / (altura_maior - altura_menor)
+
+
+if __name__ == "__main__":
+    altura_menor = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    altura_maior = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    blocos_residentes = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    por_bloco = medir(altura_menor, altura_maior, blocos_residentes)
+    print(f"{por_bloco:.1f} bytes por bloco acrescentado ({blocos_residentes} blocos residentes)")
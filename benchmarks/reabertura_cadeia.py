@@ -0,0 +1,54 @@
+"""
+Mede o tempo para reabrir uma cadeia em arquivo em duas alturas, retomando os
+índices derivados gravados (MMR, transações vistas, colunas, análise e comunidade)
+e reconstruindo-os do zero, apenas a partir do arquivo da cadeia e do seu índice.
+Se os índices são retomados, o tempo de reabertura não cresce com a cadeia.
+
+Uso: python -m benchmarks.reabertura_cadeia [altura_menor] [altura_maior]
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+from typing import Tuple
+from src.usuario import Usuario
+from src.blockchain import Blockchain
+from benchmarks.memoria_cadeia import _crescer_ate
+
+
+def _reabrir(arquivo_cadeia: str) -> float:
+    inicio = time.perf_counter()
+    blockchain = Blockchain(arquivo_cadeia=arquivo_cadeia)
+    duracao = time.perf_counter() - inicio
+    blockchain.fechar()
+    return duracao
+
+
+def medir(altura: int) -> Tuple[float, float]:
+    """Retorna o tempo de reabertura retomando os índices e reconstruindo-os."""
+    with tempfile.TemporaryDirectory() as diretorio:
+        arquivo_cadeia = os.path.join(diretorio, "cadeia.bin")
+        blockchain = Blockchain(arquivo_cadeia=arquivo_cadeia, blocos_residentes=8)
+        usuarios = [Usuario(f"usuario{i}", blockchain, 1_000_000.0) for i in range(2)]
+        _crescer_ate(blockchain, usuarios, altura)
+        blockchain.fechar()
+
+        retomando = _reabrir(arquivo_cadeia)
+
+        # só o arquivo da cadeia e o seu índice: todos os índices derivados são refeitos
+        copia = os.path.join(diretorio, "copia")
+        os.makedirs(copia)
+        for nome in ("cadeia.bin", "cadeia.bin.idx"):
+            shutil.copy(os.path.join(diretorio, nome), copia)
+        reconstruindo = _reabrir(os.path.join(copia, "cadeia.bin"))
+        return retomando, reconstruindo
+
+
+if __name__ == "__main__":
+    altura_menor = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    altura_maior = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    for altura in (altura_menor, altura_maior):
+        retomando, reconstruindo = medir(altura)
+        print(f"{altura} blocos: {retomando * 1000:.1f} ms retomando, "
+              f"{reconstruindo * 1000:.1f} ms reconstruindo")
@@ -0,0 +1,228 @@
+import os
+import numpy as np
+from uuid import UUID
+from src.colunas import CacheColunar, alocar, como_bytes, crescer, gravar_estado, ler_estado
+from typing import Dict, List, Optional, Tuple
+
+
+class AnaliseTransferencias:
+    """
+    Motor de consultas sobre as transferências da cadeia.
+    Lê as transações do cache colunar de forma incremental e mantém
+    agregados pré-computados (entradas, saídas e matrizes de fluxo por par),
+    de modo que as consultas sejam operações vetorizadas do NumPy.
+    Com um diretório, os arrays por transferência ficam em arquivos mapeados
+    em memória; os agregados dependem só da quantidade de usuários. Ao reabrir,
+    os arrays são retomados do estado gravado no diretório e os agregados são
+    recalculados a partir deles, sem reler a cadeia.
+    """
+
+    def __init__(self, diretorio: Optional[str] = None) -> None:
+        if diretorio is not None:
+            os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        estado = ler_estado(diretorio)
+        if estado is None:
+            self._iniciar()
+        else:
+            self._iniciar(estado["altura"], estado["n"], estado["capacidade"],
+                          [UUID(hex=usuario_id) for usuario_id in estado["ids"]])
+
+    def _iniciar(self, altura: int = 0, n: int = 0, capacidade: int = 64,
+                 ids: Optional[List[UUID]] = None) -> None:
+        """Inicia a análise vazia ou, com um estado gravado, retoma os arrays em arquivo."""
+        manter = n > 0
+        self._altura = altura
+        self._ids: List[UUID] = ids or []
+        self._slots: Dict[bytes, int] = {usuario_id.bytes: slot for slot, usuario_id in enumerate(self._ids)}
+
+        self._n = n
+        self._origem = alocar(capacidade, np.int64, caminho=self._caminho("origem"), manter=manter)
+        self._destino = alocar(capacidade, np.int64, caminho=self._caminho("destino"), manter=manter)
+        self._valor = alocar(capacidade, np.float64, caminho=self._caminho("valor"), manter=manter)
+        self._timestamp = alocar(capacidade, np.int64, caminho=self._caminho("timestamp"), manter=manter)
+
+        usuarios = max(16, len(self._ids))
+        origem, destino, valor = self._origem[:n], self._destino[:n], self._valor[:n]
+        self._entradas = np.bincount(destino, weights=valor, minlength=usuarios).astype(np.float64)
+        self._saidas = np.bincount(origem, weights=valor, minlength=usuarios).astype(np.float64)
+        self._fluxo = np.zeros((usuarios, usuarios), dtype=np.float64)
+        self._contagem = np.zeros((usuarios, usuarios), dtype=np.int64)
+        np.add.at(self._fluxo, (origem, destino), valor)
+        np.add.at(self._contagem, (origem, destino), 1)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _caminho(self, nome: str) -> Optional[str]:
+        return None if self.diretorio is None else os.path.join(self.diretorio, nome + ".bin")
+
+    def _slot(self, usuario: bytes) -> int:
+        slot = self._slots.get(usuario)
+        if slot is None:
+            slot = len(self._ids)
+            self._slots[usuario] = slot
+            self._ids.append(UUID(bytes=usuario))
+        return slot
+
+    def _slot_existente(self, usuario_id: UUID) -> int:
+        slot = self._slots.get(usuario_id.bytes)
+        if slot is None:
+            raise ValueError("Usuário sem transferências registradas")
+        return slot
+
+    def atualizar(self, cache: CacheColunar) -> int:
+        """
+        Incorpora as transferências dos blocos do cache ainda não analisados.
+        Retorna a quantidade de transferências acrescentadas.
+        """
+        if self._altura == len(cache):
+            return 0
+        novas = cache.fatia(self._altura, len(cache))
+        self._altura = len(cache)
+
+        # o remetente da transação gênesis é o UUID nulo
+        linhas = novas["remetente"].any(axis=1)
+        if not linhas.any():
+            self._gravar_estado()
+            return 0
+
+        origem = np.array([self._slot(u) for u in como_bytes(novas["remetente"][linhas])], dtype=np.int64)
+        destino = np.array([self._slot(u) for u in como_bytes(novas["destinatario"][linhas])], dtype=np.int64)
+        valor = novas["pontos"][linhas]
+        timestamp = novas["timestamp"][linhas]
+
+        inicio, fim = self._n, self._n + len(valor)
+        self._origem = crescer(self._origem, fim, self._caminho("origem"))
+        self._destino = crescer(self._destino, fim, self._caminho("destino"))
+        self._valor = crescer(self._valor, fim, self._caminho("valor"))
+        self._timestamp = crescer(self._timestamp, fim, self._caminho("timestamp"))
+        self._origem[inicio:fim] = origem
+        self._destino[inicio:fim] = destino
+        self._valor[inicio:fim] = valor
+        self._timestamp[inicio:fim] = timestamp
+        self._n = fim
+
+        usuarios = len(self._ids)
+        self._entradas = crescer(self._entradas, usuarios)
+        self._saidas = crescer(self._saidas, usuarios)
+        if usuarios > len(self._fluxo):
+            capacidade = max(usuarios, 2 * len(self._fluxo))
+            fluxo = np.zeros((capacidade, capacidade), dtype=np.float64)
+            contagem = np.zeros((capacidade, capacidade), dtype=np.int64)
+            fluxo[:len(self._fluxo), :len(self._fluxo)] = self._fluxo
+            contagem[:len(self._contagem), :len(self._contagem)] = self._contagem
+            self._fluxo, self._contagem = fluxo, contagem
+
+        np.add.at(self._saidas, origem, valor)
+        np.add.at(self._entradas, destino, valor)
+        np.add.at(self._fluxo, (origem, destino), valor)
+        np.add.at(self._contagem, (origem, destino), 1)
+        self._gravar_estado()
+        return len(valor)
+
+    def _gravar_estado(self) -> None:
+        if self.diretorio is not None:
+            gravar_estado(
+                self.diretorio,
+                (self._origem, self._destino, self._valor, self._timestamp),
+                {
+                    "altura": self._altura,
+                    "n": self._n,
+                    "capacidade": len(self._origem),
+                    "ids": [usuario_id.hex for usuario_id in self._ids],
+                },
+            )
+
+    def retomar(self, cache: CacheColunar) -> int:
+        """
+        Confere a análise retomada do disco com o cache colunar: se ela cobrir
+        mais blocos do que o cache (que foi descartado ou encolheu), recomeça vazia.
+        Retorna a quantidade de blocos já analisados.
+        """
+        if self._altura > len(cache):
+            self._iniciar()
+            self._gravar_estado()
+        return self._altura
+
+    def totais(self) -> Dict[UUID, Tuple[float, float]]:
+        """Retorna, para cada usuário, o total de entradas e de saídas."""
+        n = len(self._ids)
+        return {
+            usuario_id: (float(entrada), float(saida))
+            for usuario_id, entrada, saida in zip(self._ids, self._entradas[:n], self._saidas[:n])
+        }
+
+    def totais_usuario(self, usuario_id: UUID) -> Tuple[float, float]:
+        """Retorna o total de entradas e de saídas do usuário."""
+        slot = self._slot_existente(usuario_id)
+        return float(self._entradas[slot]), float(self._saidas[slot])
+
+    def matriz_fluxos(self, contagem: bool = False) -> Tuple[List[UUID], np.ndarray]:
+        """
+        Retorna os IDs dos usuários e a matriz de fluxos, onde a posição [i, j]
+        é o volume enviado de i para j (ou a quantidade de transferências, se `contagem`).
+        """
+        n = len(self._ids)
+        matriz = self._contagem if contagem else self._fluxo
+        return list(self._ids), matriz[:n, :n].copy()
+
+    def principais_contrapartes(self, usuario_id: UUID, k: int = 5) -> List[Tuple[UUID, float]]:
+        """Retorna os k usuários com maior volume trocado (nos dois sentidos) com o usuário."""
+        slot = self._slot_existente(usuario_id)
+        n = len(self._ids)
+        volume = self._fluxo[slot, :n] + self._fluxo[:n, slot]
+        volume[slot] = 0.0
+
+        candidatos = np.flatnonzero(volume)
+        if len(candidatos) > k:
+            candidatos = candidatos[np.argpartition(volume[candidatos], len(candidatos) - k)[-k:]]
+        ordenados = candidatos[np.argsort(volume[candidatos])[::-1]]
+        return [(self._ids[i], float(volume[i])) for i in ordenados]
+
+    def volume_por_janela(self, janela_segundos: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Agrupa o volume transferido em janelas de tempo consecutivas.
+        Retorna o início de cada janela (datetime64) e o volume de cada uma.
+        """
+        if janela_segundos <= 0:
+            raise ValueError("A janela de tempo deve ser positiva")
+        if self._n == 0:
+            return np.array([], dtype="datetime64[us]"), np.array([], dtype=np.float64)
+
+        timestamp = self._timestamp[:self._n]
+        janela_us = int(janela_segundos * 1_000_000)
+        origem = int(timestamp.min()) // janela_us * janela_us
+        indices = (timestamp - origem) // janela_us
+
+        volumes = np.bincount(indices, weights=self._valor[:self._n])
+        inicios = (origem + np.arange(len(volumes), dtype=np.int64) * janela_us).astype("datetime64[us]")
+        return inicios, volumes
+
+    def transferencias_circulares(self) -> List[List[UUID]]:
+        """
+        Detecta grupos de usuários com transferências circulares, ou seja,
+        em que pontos saem de um usuário e voltam para ele passando pelos demais.
+        O fecho transitivo do grafo é calculado por multiplicação de matrizes booleanas.
+        """
+        n = len(self._ids)
+        if n == 0:
+            return []
+
+        alcance = self._contagem[:n, :n] > 0
+        while True:
+            proximo = alcance | ((alcance.astype(np.int64) @ alcance.astype(np.int64)) > 0)
+            if np.array_equal(proximo, alcance):
+                break
+            alcance = proximo
+
+        em_ciclo = np.flatnonzero(np.diagonal(alcance))
+        if len(em_ciclo) == 0:
+            return []
+
+        mutuo = (alcance & alcance.T)[np.ix_(em_ciclo, em_ciclo)]
+        _, grupos = np.unique(mutuo, axis=0, return_inverse=True)
+        return [
+            [self._ids[i] for i in em_ciclo[grupos.ravel() == grupo]]
+            for grupo in range(grupos.max() + 1)
+        ]
@@ -0,0 +1,154 @@
+import os
+import pickle
+import struct
+import threading
+from src.bloco import Bloco
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Iterator, List, Union
+
+_CABECALHO = struct.Struct(">I")
+_POSICAO = struct.Struct(">Q")
+
+
+class CadeiaPaginada(Sequence):
+    """
+    Cadeia de blocos armazenada em um arquivo append-only, com apenas
+    um número fixo de blocos recentes ou muito acessados mantidos em memória (LRU).
+    Blocos mais antigos são lidos do arquivo sob demanda. Indexação, fatias,
+    iteração e `append` funcionam como em uma lista, então pode substituir
+    `Blockchain.cadeia`. A posição de cada registro fica em um arquivo de índice
+    ao lado (`caminho + ".idx"`, 8 bytes por bloco), então em memória ficam apenas
+    os blocos residentes, independentemente do tamanho da cadeia.
+    """
+
+    def __init__(self, caminho: str, blocos_residentes: int = 1024) -> None:
+        if blocos_residentes < 1:
+            raise ValueError("A quantidade de blocos residentes deve ser positiva")
+        self.caminho = caminho
+        self.blocos_residentes = blocos_residentes
+        self._residentes: "OrderedDict[int, Bloco]" = OrderedDict()
+        self._quantidade = 0
+        self._trava = threading.Lock()
+
+        self._arquivo = open(caminho, "a+b")
+        self._indice = open(caminho + ".idx", "a+b")
+        self._indexar()
+
+    def _fim_registro(self, posicao: int, fim: int) -> int:
+        """Retorna onde termina o registro que começa em `posicao`, ou -1 se estiver incompleto."""
+        if posicao + _CABECALHO.size > fim:
+            return -1
+        self._arquivo.seek(posicao)
+        (tamanho,) = _CABECALHO.unpack(self._arquivo.read(_CABECALHO.size))
+        proximo = posicao + _CABECALHO.size + tamanho
+        return proximo if proximo <= fim else -1
+
+    def _indexar(self) -> None:
+        """
+        Confere o arquivo de índice contra o arquivo de dados ao abrir.
+        Entradas que apontam para registros incompletos são descartadas e os
+        registros ainda não indexados (por exemplo, de uma escrita interrompida
+        entre os dois arquivos) são acrescentados ao índice.
+        """
+        self._arquivo.seek(0, os.SEEK_END)
+        fim = self._arquivo.tell()
+        self._indice.seek(0, os.SEEK_END)
+        self._quantidade = self._indice.tell() // _POSICAO.size
+
+        posicao = 0
+        while self._quantidade > 0:
+            posicao = self._fim_registro(self._posicao(self._quantidade - 1), fim)
+            if posicao != -1:
+                break
+            self._quantidade -= 1
+        if self._quantidade == 0:
+            posicao = 0
+
+        novas = []
+        while True:
+            proximo = self._fim_registro(posicao, fim)
+            if proximo == -1:
+                # registro incompleto de uma escrita interrompida
+                break
+            novas.append(_POSICAO.pack(posicao))
+            posicao = proximo
+        self._arquivo.truncate(posicao)
+        self._indice.truncate(self._quantidade * _POSICAO.size)
+        self._indice.write(b"".join(novas))
+        self._indice.flush()
+        self._quantidade += len(novas)
+
+    def _posicao(self, indice: int) -> int:
+        self._indice.seek(indice * _POSICAO.size)
+        (posicao,) = _POSICAO.unpack(self._indice.read(_POSICAO.size))
+        return posicao
+
+    def __len__(self) -> int:
+        return self._quantidade
+
+    def __getitem__(self, indice: Union[int, slice]) -> Union[Bloco, List[Bloco]]:
+        if isinstance(indice, slice):
+            inicio, fim, passo = indice.indices(len(self))
+            if passo == 1:
+                return list(self._ler_sequencia(inicio, fim))
+            return [self[i] for i in range(inicio, fim, passo)]
+
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError("Índice fora da cadeia")
+
+        with self._trava:
+            bloco = self._residentes.get(indice)
+            if bloco is not None:
+                self._residentes.move_to_end(indice)
+                return bloco
+            bloco = self._ler(indice)
+            self._guardar(indice, bloco)
+            return bloco
+
+    def __iter__(self) -> Iterator[Bloco]:
+        return self._ler_sequencia(0, len(self))
+
+    def append(self, bloco: Bloco) -> None:
+        """Grava o bloco no fim do arquivo e o mantém em memória como bloco quente."""
+        dados = pickle.dumps(bloco, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._trava:
+            self._arquivo.seek(0, os.SEEK_END)
+            posicao = self._arquivo.tell()
+            self._arquivo.write(_CABECALHO.pack(len(dados)) + dados)
+            self._arquivo.flush()
+            # o índice só é gravado depois do registro completo
+            self._indice.write(_POSICAO.pack(posicao))
+            self._indice.flush()
+            self._quantidade += 1
+            self._guardar(self._quantidade - 1, bloco)
+
+    def fechar(self) -> None:
+        self._arquivo.close()
+        self._indice.close()
+
+    def _guardar(self, indice: int, bloco: Bloco) -> None:
+        self._residentes[indice] = bloco
+        self._residentes.move_to_end(indice)
+        while len(self._residentes) > self.blocos_residentes:
+            self._residentes.popitem(last=False)
+
+    def _ler(self, indice: int) -> Bloco:
+        self._arquivo.seek(self._posicao(indice))
+        (tamanho,) = _CABECALHO.unpack(self._arquivo.read(_CABECALHO.size))
+        return pickle.loads(self._arquivo.read(tamanho))
+
+    def _ler_sequencia(self, inicio: int, fim: int) -> Iterator[Bloco]:
+        """
+        Lê os blocos em [inicio, fim) em ordem. Blocos que não estão em memória
+        são lidos do arquivo sem entrar no LRU, para que varreduras completas
+        não expulsem os blocos quentes.
+        """
+        for indice in range(inicio, fim):
+            with self._trava:
+                bloco = self._residentes.get(indice)
+                if bloco is None:
+                    bloco = self._ler(indice)
+            yield bloco
@@ -1,9 +1,28 @@
+import os
+import time
+import pickle
+import itertools
+import threading
+import numpy as np
 from uuid import UUID
+from concurrent.futures import ThreadPoolExecutor
 from src.bloco import Bloco
+from src.trava import TravaLeituraEscrita
+from src.armazenamento import CadeiaPaginada
+from src.grafo import GrafoComunidade
+from src.mmr import MerkleMountainRange, ProvaInclusao, ResumoMMR, hash_folha
 from src.transacao import Transacao
-from collections import defaultdict
+from src.mineracao import PoolMineracao
+from src.estado import GerenciadorSnapshots, RegistroUsuarios, reproduzir_saldos
+from src.colunas import CacheColunar
+from src.analise import AnaliseTransferencias
+from src.livro_saldos import LivroSaldos, para_fixo, valor_valido
+from src.metricas import MetricasRede, ResumoMetricas
+from src.indice_transacoes import IndiceTransacoes
+from src.certificado import CertificadoQuorum, Voto, digest_eleitorado
+from src.eleitorado import HistoricoEleitorado, RegistroChaves
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
-from typing import List, Dict, Set, Optional, DefaultDict, TYPE_CHECKING
+from typing import List, Dict, FrozenSet, Iterator, Optional, Sequence, Tuple, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from src.usuario import Usuario
@@ -16,17 +35,157 @@ class Blockchain:
     A cadeia de blocos é administrada pelos próprios blocos
     """
 
-    def __init__(self) -> None:
-        self.cadeia: List[Bloco] = []
+    def __init__(self, snapshots: Optional[GerenciadorSnapshots] = None,
+                 transacoes_vistas: Optional[IndiceTransacoes] = None,
+                 arquivo_cadeia: Optional[str] = None, blocos_residentes: int = 1024,
+                 dificuldade: int = 0, processos_mineracao: Optional[int] = None) -> None:
+        # com um arquivo, apenas `blocos_residentes` blocos ficam em memória
+        self.arquivo_cadeia = arquivo_cadeia
+        self.cadeia: Sequence[Bloco] = []
+        if arquivo_cadeia is not None:
+            self.cadeia = CadeiaPaginada(arquivo_cadeia, blocos_residentes)
         self.tamanho = 0
-
-        self.comunidade: DefaultDict[UUID, Set[UUID]] = defaultdict(set)
+        self.snapshots = snapshots
+        if transacoes_vistas is None:
+            # com a cadeia em arquivo, o índice de transações também fica em disco
+            caminho_vistas = None if arquivo_cadeia is None else arquivo_cadeia + ".vistas"
+            transacoes_vistas = IndiceTransacoes(caminho=caminho_vistas)
+        self.transacoes_vistas = transacoes_vistas
+        self.pendentes: Dict[UUID, Transacao] = {}
+
+        # bits iniciais zerados exigidos no hash de novos blocos (0 desativa a prova de trabalho)
+        if not 0 <= dificuldade <= 255:
+            raise ValueError("A dificuldade deve estar entre 0 e 255 bits")
+        self.dificuldade = dificuldade
+        # processos de mineração reaproveitados entre os blocos, criados na primeira busca
+        self.mineracao = PoolMineracao(processos_mineracao)
+
+        self.comunidade = GrafoComunidade()
+        # usuários ativos em cada altura, usados para verificar certificados de quórum
+        self.eleitorado = HistoricoEleitorado(
+            None if arquivo_cadeia is None else arquivo_cadeia + ".eleitorado"
+        )
+        # chaves de todos os eleitores que já votaram, para verificar certificados ao reabrir
+        self.chaves_eleitores = RegistroChaves(
+            None if arquivo_cadeia is None else arquivo_cadeia + ".chaves"
+        )
         self.chaves_publicas: Dict[UUID, RSAPublicKey] = {}
         self.usuarios_registrados: List["Usuario"] = []
         self.usuarios_por_id: Dict[UUID, "Usuario"] = {}
         self.todos_usuarios: List["Usuario"] = []
+        self.saldos_iniciais: Dict[UUID, float] = {}
+        # com a cadeia em arquivo, os usuários são gravados para serem recriados ao reabrir
+        self.registro_usuarios = (
+            None if arquivo_cadeia is None else RegistroUsuarios(arquivo_cadeia + ".usuarios")
+        )
+        # com a cadeia em arquivo, os índices que crescem por bloco também ficam em disco
+        em_disco = arquivo_cadeia is not None
+        self.mmr = MerkleMountainRange(arquivo_cadeia + ".mmr" if em_disco else None)
+        self.livro = LivroSaldos()
+        self._metricas = MetricasRede(self.livro)
+        self._colunas = CacheColunar(diretorio=arquivo_cadeia + ".colunas" if em_disco else None)
+        self._analise = AnaliseTransferencias(arquivo_cadeia + ".analise" if em_disco else None)
+
+        # leitores concorrentes não se bloqueiam; escritas são exclusivas
+        self.trava = TravaLeituraEscrita()
+        # serializa as propostas de bloco, inclusive a fase de consenso
+        self._trava_proposta = threading.Lock()
+        # protege os caches derivados, que são atualizados durante leituras
+        self._trava_cache = threading.Lock()
+
+        if len(self.cadeia) == 0:
+            self._genesis_block()
+        else:
+            self._reconstruir_indices()
 
-        self._genesis_block()
+    def _blocos(self, inicio: int) -> Iterator[Bloco]:
+        """Percorre os blocos a partir da altura `inicio`, lendo a cadeia em lotes."""
+        for lote in range(inicio, len(self.cadeia), 1000):
+            yield from self.cadeia[lote:lote + 1000]
+
+    def _reconstruir_indices(self) -> None:
+        """
+        Retoma as estruturas derivadas ao reabrir uma cadeia armazenada em arquivo.
+        Cada índice em disco (MMR, transações vistas, colunas e análise) sabe até
+        que altura foi gravado e é conferido com a cadeia; apenas os blocos
+        seguintes são acrescentados, e um índice que não confere recomeça do gênesis.
+        A comunidade e os totais de transações vêm do estado gravado por `fechar`.
+        Os saldos dependem dos usuários e são restaurados com `restaurar_saldos`
+        (veja `src.usuario.abrir_rede`).
+        """
+        altura = len(self.cadeia)
+        self.tamanho = altura
+
+        # o MMR é mantido enquanto a sua última folha for o bloco da mesma altura
+        folhas = min(len(self.mmr), altura)
+        if folhas > 0 and self.mmr.folha(folhas - 1) != hash_folha(self.cadeia[folhas - 1].hash):
+            folhas = 0
+        self.mmr.truncar(folhas)
+        for bloco in self._blocos(folhas):
+            self.mmr.adicionar(bloco.hash)
+
+        # o índice de transações só cresce, então uma cadeia menor que ele exige recomeçar
+        if self.transacoes_vistas.altura > altura:
+            self.transacoes_vistas.limpar()
+        for inicio in range(self.transacoes_vistas.altura, altura, 1000):
+            fim = min(inicio + 1000, altura)
+            self.transacoes_vistas.adicionar_lote([bloco.transacao for bloco in self.cadeia[inicio:fim]], fim)
+
+        # as colunas e a análise são atualizadas sob demanda, a partir do que foi mantido
+        self._colunas.retomar(self.cadeia)
+        self._analise.retomar(self._colunas)
+
+        for bloco in self._blocos(self._retomar_estado()):
+            transacao = bloco.transacao
+            if transacao.remetente != UUID(int=0):
+                self.comunidade.registrar(transacao.remetente, transacao.destinatario, transacao.pontos)
+                self._metricas.transacao_efetivada(transacao.pontos)
+
+    def _retomar_estado(self) -> int:
+        """
+        Carrega a comunidade e os totais de transações gravados por `fechar`,
+        se a altura e o hash gravados conferirem com a cadeia.
+        Retorna a altura a partir da qual os blocos ainda precisam ser reproduzidos.
+        """
+        caminho = self.arquivo_cadeia + ".estado"
+        if not os.path.exists(caminho):
+            return 0
+        with open(caminho, "rb") as arquivo:
+            estado = pickle.load(arquivo)
+        altura = estado["altura"]
+        if altura > len(self.cadeia) or self.cadeia[altura - 1].hash != estado["hash"]:
+            return 0
+        self.comunidade = estado["comunidade"]
+        self._metricas.retomar_transacoes(estado["transacoes"], estado["volume"])
+        return altura
+
+    def fechar(self) -> None:
+        """
+        Encerra os processos de mineração e fecha uma cadeia em arquivo. Antes, grava
+        o estado derivado que fica só em memória (comunidade e totais de transações),
+        marcado com a altura e o hash do último bloco, para que a próxima abertura
+        reproduza apenas os blocos seguintes.
+        """
+        self.mineracao.fechar()
+        if self.arquivo_cadeia is None:
+            return
+        with self.trava.escrita():
+            transacoes, volume = self._metricas.transacoes_efetivadas()
+            estado = {
+                "altura": len(self.cadeia),
+                "hash": self.cadeia[-1].hash,
+                "comunidade": self.comunidade,
+                "transacoes": transacoes,
+                "volume": volume,
+            }
+            caminho = self.arquivo_cadeia + ".estado"
+            with open(caminho + ".tmp", "wb") as arquivo:
+                pickle.dump(estado, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(caminho + ".tmp", caminho)
+
+            self.cadeia.fechar()
+            self.mmr.fechar()
+            self.transacoes_vistas.fechar()
 
     def _genesis_block(self):
         """
@@ -43,44 +202,117 @@ class Blockchain:
         bloco.assinatura = None
         self.cadeia.append(bloco)
         self.tamanho = 1
+        self.mmr.adicionar(bloco.hash)
+        self.transacoes_vistas.adicionar(transacao, altura=1)
 
     def registrar_usuario(self, usuario: "Usuario") -> None:
         """Registra a chave pública de um usuário na blockchain."""
-        self.chaves_publicas[usuario.id] = usuario.chave_publica
-        self.usuarios_registrados.append(usuario)
-        self.usuarios_por_id[usuario.id] = usuario
-        if usuario not in self.todos_usuarios:
-            self.todos_usuarios.append(usuario)
+        with self.trava.escrita():
+            # recusa, antes de alterar qualquer estado, um ID conhecido com outra chave
+            self.chaves_eleitores.registrar(usuario.id, usuario.chave_publica)
+            self.chaves_publicas[usuario.id] = usuario.chave_publica
+            self.usuarios_registrados.append(usuario)
+            self.usuarios_por_id[usuario.id] = usuario
+            # o usuário pode ter sido criado em outra blockchain, sem slot neste livro
+            self.livro.registrar(usuario.id)
+            self.livro.definir_ativo(usuario.id, True)
+            self._metricas.usuario_registrado()
+            self.eleitorado.registrar(len(self.cadeia), self.usuarios_por_id)
+            if usuario not in self.todos_usuarios:
+                self.todos_usuarios.append(usuario)
+                self.saldos_iniciais[usuario.id] = usuario.pontos
+                if self.registro_usuarios is not None:
+                    self.registro_usuarios.registrar({**usuario.para_dict(), "pontos": usuario.pontos})
+
+    def metricas(self) -> ResumoMetricas:
+        """
+        Retorna uma fotografia somente leitura dos agregados da rede:
+        usuários ativos e banidos, pontos totais e ativos, transações e volume,
+        taxa de aceitação do consenso e latência média dos blocos recentes.
+        """
+        with self.trava.leitura():
+            return self._metricas.resumo()
+
+    def saldos(self) -> Dict[UUID, float]:
+        """Retorna os saldos atuais de todos os usuários, ativos ou banidos."""
+        with self.trava.leitura():
+            return {usuario.id: usuario.pontos for usuario in self.todos_usuarios}
+
+    def restaurar_saldos(self) -> int:
+        """
+        Restaura os saldos a partir do snapshot mais recente e reproduz
+        apenas os blocos posteriores a ele. Sem gerenciador de snapshots,
+        reproduz a cadeia inteira a partir dos saldos iniciais.
+        Lança ValueError se os saldos citarem usuários não registrados.
+        Retorna a quantidade de blocos reproduzidos.
+        """
+        with self.trava.escrita():
+            if self.snapshots is None:
+                return reproduzir_saldos(self)
+            return self.snapshots.restaurar(self)
 
     def banir(self, usuario_id: UUID) -> None:
         """
         Banir um usuário da blockchain.
         Remove o usuário da lista de usuários registrados e limpa sua chave pública.
         """
-        if usuario_id in self.usuarios_por_id:
-            usuario = self.usuarios_por_id[usuario_id]
-            if usuario in self.usuarios_registrados:
-                self.usuarios_registrados.remove(usuario)
-                del self.chaves_publicas[usuario_id]
-                del self.usuarios_por_id[usuario_id]
-                print(f"Usuário {usuario.nome} banido com sucesso.")
+        with self.trava.escrita():
+            if usuario_id in self.usuarios_por_id:
+                usuario = self.usuarios_por_id[usuario_id]
+                if usuario in self.usuarios_registrados:
+                    self.usuarios_registrados.remove(usuario)
+                    del self.chaves_publicas[usuario_id]
+                    del self.usuarios_por_id[usuario_id]
+                    self.livro.definir_ativo(usuario_id, False)
+                    self._metricas.usuario_banido()
+                    self.eleitorado.registrar(len(self.cadeia), self.usuarios_por_id)
+                    print(f"Usuário {usuario.nome} banido com sucesso.")
+                else:
+                    print(f"Usuário {usuario.nome} já está banido.")
             else:
-                print(f"Usuário {usuario.nome} já está banido.")
-        else:
-            print("Usuário não encontrado na blockchain.")
+                print("Usuário não encontrado na blockchain.")
 
     def desbanir(self, usuario_id: UUID) -> bool:
         """
         Desbane um usuário da blockchain, permitindo que ele volte a participar.
         """
-        for usuario in self.todos_usuarios:
-            if usuario.id == usuario_id and usuario_id not in self.usuarios_por_id:
-                self.usuarios_registrados.append(usuario)
-                self.usuarios_por_id[usuario_id] = usuario
-                self.chaves_publicas[usuario_id] = usuario.chave_publica
-                print(f"Usuário {usuario.nome} foi desbanido com sucesso.")
-                return True
-        return False
+        with self.trava.escrita():
+            for usuario in self.todos_usuarios:
+                if usuario.id == usuario_id and usuario_id not in self.usuarios_por_id:
+                    self.usuarios_registrados.append(usuario)
+                    self.usuarios_por_id[usuario_id] = usuario
+                    self.chaves_publicas[usuario_id] = usuario.chave_publica
+                    self.livro.definir_ativo(usuario_id, True)
+                    self._metricas.usuario_desbanido()
+                    self.eleitorado.registrar(len(self.cadeia), self.usuarios_por_id)
+                    print(f"Usuário {usuario.nome} foi desbanido com sucesso.")
+                    return True
+            return False
+
+    def admitir_transacao(self, transacao: Transacao) -> Tuple[bool, str]:
+        """
+        Admite uma transação assinada na lista de pendentes (mempool).
+        Retorna uma tupla com a decisão e o motivo.
+        """
+        with self.trava.escrita():
+            chave = self.get_chave(transacao.remetente)
+            if chave is None or transacao.destinatario not in self.usuarios_por_id:
+                return False, "Algum participante da transação não está ativo na blockchain"
+            if not valor_valido(transacao.pontos):
+                return False, "Valor da transação inválido"
+            if transacao.id in self.pendentes:
+                return False, "Transação já está pendente"
+            if self.transacoes_vistas.contem(transacao):
+                return False, "Transação já registrada na cadeia"
+            if not transacao.validar(chave):
+                return False, "Assinatura da transação inválida"
+            self.pendentes[transacao.id] = transacao
+            return True, "Transação admitida"
+
+    def remover_pendente(self, transacao_id: UUID) -> None:
+        """Remove uma transação da lista de pendentes, se estiver nela."""
+        with self.trava.escrita():
+            self.pendentes.pop(transacao_id, None)
 
     def compare_pontos(self, usuario_id: UUID, pontos: float) -> bool:
         """
@@ -91,7 +323,7 @@ class Blockchain:
         if not usuario:
             raise ValueError("Usuário não encontrado na blockchain")
 
-        return usuario.pontos >= pontos
+        return self.livro.possui(usuario_id, pontos)
 
     def get_chave(self, uuid: UUID) -> Optional[RSAPublicKey]:
         """
@@ -100,6 +332,26 @@ class Blockchain:
         """
         return self.chaves_publicas.get(uuid)
 
+    def colunas(self) -> Dict[str, np.ndarray]:
+        """
+        Retorna uma cópia das colunas da cadeia, tirada sob as travas,
+        após acrescentar ao cache apenas os blocos ainda não copiados para ele.
+        Todas as colunas têm o mesmo tamanho mesmo com outras sessões minerando.
+        """
+        with self.trava.leitura(), self._trava_cache:
+            self._colunas.atualizar(self.cadeia)
+            return self._colunas.fatia(0, len(self._colunas))
+
+    def analise(self) -> AnaliseTransferencias:
+        """
+        Retorna o motor de consultas de transferências,
+        atualizado com os blocos adicionados desde a última consulta.
+        """
+        with self.trava.leitura(), self._trava_cache:
+            self._colunas.atualizar(self.cadeia)
+            self._analise.atualizar(self._colunas)
+        return self._analise
+
     def ultimo_bloco(self) -> Bloco:
         """
         Retorna o último bloco da cadeia.
@@ -107,18 +359,193 @@ class Blockchain:
         """
         return self.cadeia[-1]
 
+    def prova_inclusao(self, altura: int) -> ProvaInclusao:
+        """
+        Retorna a prova de inclusão do bloco na altura informada,
+        verificável contra a raiz do MMR com `src.mmr.verificar_prova`.
+        A prova é montada sob a trava de leitura, para que o tamanho, o caminho
+        e os picos sejam do mesmo estado do MMR mesmo com outras sessões minerando.
+        """
+        with self.trava.leitura():
+            return self.mmr.prova(altura)
+
     def adicionar_bloco(self, bloco: Bloco, log_callback=None) -> bool:
         """
         Adiciona um novo bloco à blockchain apenas após
         validação completa e consenso entre os usuários.
+        Propostas são serializadas; a trava de escrita é mantida
+        apenas durante a efetivação, e não durante a votação.
+        """
+        with self._trava_proposta:
+            inicio = time.perf_counter()
+            aceito = self._consenso(bloco, log_callback)
+            self._metricas.consenso(aceito)
+            if not aceito:
+                return False
+            with self.trava.escrita():
+                efetivado = self._efetivar_bloco(bloco, log_callback)
+                if efetivado:
+                    self._metricas.latencia_bloco(time.perf_counter() - inicio)
+                return efetivado
+
+    def adicionar_blocos(self, blocos: List[Bloco], max_threads: Optional[int] = None,
+                         exigir_certificado: bool = False) -> Tuple[bool, Optional[int], str]:
+        """
+        Importa um lote de blocos já aceitos pela rede, como na restauração
+        da cadeia ou na carga de um corpus de teste, sem refazer o consenso.
+        1. Confere a prova de trabalho de cada bloco, em O(1) por bloco,
+           e valida assinaturas e hashes de todo o lote em paralelo.
+           Certificados de quórum presentes também são verificados nesta etapa,
+           e podem ser exigidos com `exigir_certificado`.
+        2. Verifica em ordem o encadeamento, os compromissos MMR, replays e saldos.
+        3. Efetiva todos os blocos de forma atômica, ou nenhum deles.
+        Cada etapa examina apenas os blocos anteriores à primeira falha já encontrada,
+        de modo que o índice retornado é o do primeiro bloco inválido do lote,
+        qualquer que seja a etapa em que ele falha.
+        Retorna uma tupla com o sucesso, o índice do primeiro bloco inválido no lote e o motivo.
+        O índice é None se a falha não puder ser atribuída a um bloco; nesse caso,
+        como em qualquer falha, nenhum bloco do lote é efetivado.
+        """
+        if not blocos:
+            return True, None, "Lote vazio"
+
+        limite, motivo = len(blocos), ""
+
+        for indice, bloco in enumerate(blocos):
+            if not bloco.prova_trabalho_valida(self.dificuldade):
+                limite, motivo = indice, "Prova de trabalho inválida"
+                break
+
+        with ThreadPoolExecutor(max_workers=max_threads) as executor:
+            validos = list(executor.map(self._validar_criptografia, blocos[:limite]))
+        for indice, valido in enumerate(validos):
+            if not valido:
+                limite, motivo = indice, "Validação criptográfica falhou"
+                break
+
+        for indice, bloco in enumerate(blocos[:limite]):
+            if bloco.certificado is None:
+                if exigir_certificado:
+                    limite, motivo = indice, "Certificado de quórum ausente"
+                    break
+            elif not self.verificar_certificado(bloco, max_threads):
+                limite, motivo = indice, "Certificado de quórum inválido"
+                break
+
+        with self._trava_proposta, self.trava.escrita():
+            indice, motivo_sequencia, variacoes = self._validar_sequencia(blocos[:limite])
+            if indice is not None:
+                return False, indice, motivo_sequencia
+            if limite < len(blocos):
+                return False, limite, motivo
+
+            # os saldos do lote inteiro são aplicados de uma vez, e só então os blocos
+            # são acrescentados, em passos que não validam nada e portanto não recusam blocos
+            try:
+                self.livro.aplicar_variacoes(variacoes)
+            except ValueError as erro:
+                return False, None, f"Saldos do lote recusados pelo livro: {erro}"
+            for bloco in blocos:
+                self._acrescentar_bloco(bloco, salvar_snapshot=False)
+            # os saldos só correspondem à cadeia no fim do lote
+            if self.snapshots is not None:
+                self.snapshots.talvez_salvar(self)
+
+        print(f"Lote de {len(blocos)} blocos importado com sucesso!")
+        return True, None, "Lote importado"
+
+    def eleitores(self, minerador: UUID) -> FrozenSet[UUID]:
+        """Retorna os usuários ativos que votam em um bloco proposto pelo minerador."""
+        with self.trava.leitura():
+            return frozenset(self.usuarios_por_id) - {minerador}
+
+    def verificar_certificado(self, bloco: Bloco, max_threads: Optional[int] = None,
+                              altura: Optional[int] = None) -> bool:
+        """
+        Verifica o certificado de quórum do bloco com as chaves de todos os
+        usuários já registrados, inclusive os banidos depois da votação.
+        As chaves vêm do registro persistido ao lado da cadeia, então a verificação
+        funciona ao reabrir uma cadeia em arquivo, mesmo sem os usuários em memória.
+        O eleitorado esperado vem da cadeia, e não do certificado: são os usuários
+        ativos na altura do bloco, exceto o minerador. Sem altura, o bloco é tratado
+        como o próximo da cadeia e o eleitorado é o conjunto de usuários ativos atual.
+        """
+        if bloco.certificado is None:
+            return False
+        if altura is None:
+            esperado = self.eleitores(bloco.minerador)
+        else:
+            esperado = self.eleitorado.em(altura) - {bloco.minerador}
+        return bloco.certificado.verificar(bloco.hash, esperado, self.chaves_eleitores.chaves(), max_threads)
+
+    def _validar_criptografia(self, bloco: Bloco) -> bool:
+        """Verifica hash e assinaturas do bloco, como em `Usuario.consentir`."""
+        chave_minerador = self.get_chave(bloco.minerador)
+        chave_emitente = self.get_chave(bloco.transacao.remetente)
+        if not chave_minerador or not chave_emitente:
+            return False
+        return bloco.validar(chave_minerador) and bloco.validar(chave_emitente)
+
+    def _validar_sequencia(self, blocos: List[Bloco]) -> Tuple[Optional[int], str, Dict[UUID, int]]:
+        """
+        Simula a inclusão dos blocos em ordem, sem alterar a cadeia, com as mesmas
+        regras de `_efetivar_bloco`. Retorna o índice do primeiro bloco inválido
+        e o motivo, ou (None, ""), e as variações líquidas de saldo do lote em ponto fixo.
+        """
+        hash_anterior = self.ultimo_bloco().hash
+        mmr = self.mmr.resumo()
+        vistas = set()
+        variacoes: Dict[UUID, int] = {}
+
+        for indice, bloco in enumerate(blocos):
+            transacao = bloco.transacao
+            if bloco.hash_anterior != hash_anterior:
+                return indice, "Hash anterior inválido", variacoes
+            if bloco.raiz_mmr is not None and bloco.raiz_mmr != mmr.raiz():
+                return indice, "Raiz MMR inválida", variacoes
+            if not self._eleitorado_confere(bloco):
+                return indice, "O eleitorado mudou desde a votação", variacoes
+            if transacao.id in vistas or self.transacoes_vistas.contem(transacao):
+                return indice, "Transação já registrada na cadeia", variacoes
+            if transacao.remetente not in self.usuarios_por_id or transacao.destinatario not in self.usuarios_por_id:
+                return indice, "Algum participante da transação está banido da blockchain", variacoes
+            if not valor_valido(transacao.pontos):
+                return indice, "Valor da transação inválido", variacoes
+
+            quantia = para_fixo(transacao.pontos)
+            disponivel = para_fixo(self.livro.saldo(transacao.remetente)) + variacoes.get(transacao.remetente, 0)
+            if disponivel < quantia:
+                return indice, "Saldo insuficiente do remetente", variacoes
+
+            variacoes[transacao.remetente] = variacoes.get(transacao.remetente, 0) - quantia
+            variacoes[transacao.destinatario] = variacoes.get(transacao.destinatario, 0) + quantia
+            vistas.add(transacao.id)
+            mmr.adicionar(bloco.hash)
+            hash_anterior = bloco.hash
+
+        return None, "", variacoes
+
+    def _consenso(self, bloco: Bloco, log_callback=None) -> bool:
         """
+        Coleta os votos dos usuários ativos sobre o bloco.
+        Retorna True se a maioria aprovar.
+        """
+        # o certificado é emitido por esta votação; um bloco assinado que já chega
+        # com certificado não poderia recebê-lo e é recusado antes dos votos
+        if bloco.certificado is not None:
+            if log_callback:
+                log_callback(f"❌ ERRO: O bloco já chegou com um certificado de quórum!")
+            print(f"ERRO: Bloco {bloco.id} proposto com certificado de quórum já anexado.")
+            return False
 
-        if len(self.usuarios_registrados) > 1:
+        eleitores = list(self.usuarios_registrados)
+
+        if len(eleitores) > 1:
             favoraveis = 0
             total_usuarios = len(
-                [u for u in self.usuarios_registrados if u.id != bloco.minerador]
+                [u for u in eleitores if u.id != bloco.minerador]
             )
-            votos = []
+            votos: List[Voto] = []
 
             necessario = (total_usuarios // 2) + 1
 
@@ -130,13 +557,14 @@ class Blockchain:
                     f"📊 Necessário: {necessario} votos favoráveis para aprovação"
                 )
 
-            for usuario in self.usuarios_registrados:
+            for usuario in eleitores:
                 if usuario.id != bloco.minerador:
                     if log_callback:
                         log_callback(f"⏳ {usuario.nome} está analisando o bloco...")
 
-                    decisao, motivo = usuario.consentir(bloco)
-                    votos.append((usuario.nome, decisao, motivo))
+                    voto = usuario.votar(bloco)
+                    votos.append(voto)
+                    decisao, motivo = voto.decisao, voto.motivo
 
                     if decisao:
                         favoraveis += 1
@@ -165,16 +593,45 @@ class Blockchain:
                     f"FALHA: Bloco minerado por {bloco.minerador} não obteve consenso."
                 )
                 return False
-        elif len(self.usuarios_registrados) == 1:
+
+            bloco.certificado = CertificadoQuorum(
+                bloco.hash, votos, [u.id for u in eleitores if u.id != bloco.minerador]
+            )
+        elif len(eleitores) == 1:
             if log_callback:
                 log_callback(f"❌ ERRO: Apenas um usuário ativo na blockchain.")
             return False
-        elif len(self.usuarios_registrados) == 0:
+        elif len(eleitores) == 0:
             if log_callback:
                 log_callback(f"❌ ERRO: Nenhum usuário ativo na blockchain.")
 
             return False
 
+        return True
+
+    def _efetivar_bloco(self, bloco: Bloco, log_callback=None) -> bool:
+        """
+        Aplica a transação do bloco aos saldos e o acrescenta à cadeia.
+        Deve ser chamado com a trava de escrita adquirida.
+        """
+        if bloco.hash_anterior != self.ultimo_bloco().hash:
+            if log_callback:
+                log_callback(f"❌ ERRO: A cadeia mudou durante o consenso!")
+            print(f"ERRO: A cadeia mudou durante o consenso!")
+            return False
+
+        if not self._eleitorado_confere(bloco):
+            if log_callback:
+                log_callback(f"❌ ERRO: O eleitorado mudou durante o consenso!")
+            print(f"ERRO: O eleitorado mudou durante o consenso!")
+            return False
+
+        if self.transacoes_vistas.contem(bloco.transacao):
+            if log_callback:
+                log_callback(f"❌ ERRO: Transação já registrada na cadeia!")
+            print(f"ERRO: Transação {bloco.transacao.id} já registrada na cadeia!")
+            return False
+
         if bloco.transacao.remetente != UUID(int=0):
             remetente_usuario = self.usuarios_por_id.get(
                 bloco.transacao.remetente, None
@@ -184,9 +641,24 @@ class Blockchain:
             )
 
             if remetente_usuario and destinatario_usuario:
-                if remetente_usuario.pontos >= bloco.transacao.pontos:
-                    remetente_usuario.pontos -= bloco.transacao.pontos
-                    destinatario_usuario.pontos += bloco.transacao.pontos
+                if not valor_valido(bloco.transacao.pontos):
+                    if log_callback:
+                        log_callback(f"❌ ERRO: Valor da transação inválido!")
+                    print(f"ERRO: Valor da transação {bloco.transacao.id} inválido!")
+                    return False
+                if self.livro.possui(remetente_usuario.id, bloco.transacao.pontos):
+                    try:
+                        self.livro.transferir(
+                            remetente_usuario.id,
+                            destinatario_usuario.id,
+                            bloco.transacao.pontos,
+                        )
+                    except ValueError as erro:
+                        # o livro valida de novo; uma falha aqui não pode interromper a efetivação
+                        if log_callback:
+                            log_callback(f"❌ ERRO: Transferência recusada pelo livro de saldos: {erro}")
+                        print(f"ERRO: Transferência recusada pelo livro de saldos: {erro}")
+                        return False
                     if log_callback:
                         log_callback(
                             f"💰 Saldos atualizados: {remetente_usuario.nome} (-{bloco.transacao.pontos:.2f}) → {destinatario_usuario.nome} (+{bloco.transacao.pontos:.2f})"
@@ -202,22 +674,58 @@ class Blockchain:
                     print(f"ERRO: Saldo insuficiente no momento da execução!")
                     return False
 
+        self._acrescentar_bloco(bloco)
+        return True
+
+    def _eleitorado_confere(self, bloco: Bloco) -> bool:
+        """
+        Confere se o certificado do bloco, se houver, foi emitido pelo eleitorado
+        atual: os usuários ativos, exceto o minerador, com o mesmo digest em cada voto.
+        """
+        certificado = bloco.certificado
+        if certificado is None:
+            return True
+        esperado = frozenset(self.usuarios_por_id) - {bloco.minerador}
+        resumo = digest_eleitorado(esperado)
+        return set(certificado.eleitores) == esperado and all(v.eleitorado == resumo for v in certificado.votos)
+
+    def _acrescentar_bloco(self, bloco: Bloco, salvar_snapshot: bool = True) -> None:
+        """
+        Acrescenta à cadeia um bloco já validado e com os saldos já aplicados,
+        atualizando os índices derivados. Deve ser chamado com a trava de escrita adquirida.
+        Com `salvar_snapshot` falso, o snapshot periódico fica a cargo de quem chama.
+        """
         self.cadeia.append(bloco)
         self.tamanho += 1
+        self.mmr.adicionar(bloco.hash)
+        self.transacoes_vistas.adicionar(bloco.transacao, altura=len(self.cadeia))
+        self.pendentes.pop(bloco.transacao.id, None)
 
-        remetente = bloco.transacao.remetente
-        destinatario = bloco.transacao.destinatario
-        if remetente != UUID(int=0):
-            self.comunidade[remetente].add(destinatario)
-            self.comunidade[destinatario].add(remetente)
+        transacao = bloco.transacao
+        if transacao.remetente != UUID(int=0):
+            self.comunidade.registrar(transacao.remetente, transacao.destinatario, transacao.pontos)
+            self._metricas.transacao_efetivada(transacao.pontos)
 
-        return True
+        if salvar_snapshot and self.snapshots is not None:
+            self.snapshots.talvez_salvar(self)
 
-    def verificar(self) -> None:
-        """Verifica a integridade da blockchain"""
-        for i in range(1, len(self.cadeia)):
-            bloco_atual = self.cadeia[i]
-            bloco_anterior = self.cadeia[i - 1]
+    def verificar(self, blocos_extras: Sequence[Bloco] = ()) -> None:
+        """
+        Verifica a integridade da blockchain.
+        Os `blocos_extras` são verificados como se estivessem no fim da cadeia,
+        sem serem acrescentados a ela.
+        """
+        with self.trava.leitura():
+            self._verificar(blocos_extras)
+
+    def _verificar(self, blocos_extras: Sequence[Bloco] = ()) -> None:
+        mmr = ResumoMMR()
+        blocos = itertools.chain(self.cadeia, blocos_extras)
+        bloco_anterior = next(blocos)
+        mmr.adicionar(bloco_anterior.hash)
+        for altura, bloco_atual in enumerate(blocos, start=1):
+            if not bloco_atual.prova_trabalho_valida(self.dificuldade):
+                raise ValueError(f"Bloco {bloco_atual.id} inválido: prova de trabalho insuficiente")
 
             if bloco_atual.hash != bloco_atual.calcular_hash():
                 raise ValueError(f"Bloco {bloco_atual.id} inválido: hash incorreto")
@@ -227,4 +735,13 @@ class Blockchain:
                     f"Bloco {bloco_atual.id} inválido: hash anterior incorreto"
                 )
 
+            if bloco_atual.raiz_mmr is not None and bloco_atual.raiz_mmr != mmr.raiz():
+                raise ValueError(f"Bloco {bloco_atual.id} inválido: raiz MMR incorreta")
+
+            if bloco_atual.certificado is not None and not self.verificar_certificado(bloco_atual, altura=altura):
+                raise ValueError(f"Bloco {bloco_atual.id} inválido: certificado de quórum incorreto")
+
+            mmr.adicionar(bloco_atual.hash)
+            bloco_anterior = bloco_atual
+
         print("Blockchain verificada com sucesso! Todos os blocos são válidos.")
@@ -1,34 +1,128 @@
 import hashlib
 import datetime
+from typing import Optional, TYPE_CHECKING
 from uuid import uuid4, UUID
-from src.transacao import Transacao
+from src.transacao import Transacao, internar_id
+from src.mineracao import atende_dificuldade
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey, RSAPrivateKey
 
+if TYPE_CHECKING:
+    from src.certificado import CertificadoQuorum
+
+
+# Referência para guardar o timestamp como inteiro de microssegundos
+_EPOCA = datetime.datetime(1970, 1, 1)
+_MICROSSEGUNDO = datetime.timedelta(microseconds=1)
+
 
 class Bloco:
     """
-    Classe que representa um bloco
+    Classe que representa um bloco.
+    Os IDs são guardados como 16 bytes, o timestamp como microssegundos inteiros,
+    e o bloco se torna imutável após ser assinado, exceto pelo certificado
+    de quórum, que é anexado uma única vez após o consenso e não faz parte do hash.
+    Com `dificuldade` maior que zero, o hash cobre também a dificuldade
+    e o nonce, e precisa ter essa quantidade de bits iniciais zerados.
     """
-    def __init__(self, transacao: Transacao, hash_anterior: bytes, minerador: UUID) -> None:
+    __slots__ = (
+        "transacao", "_minerador", "hash_anterior", "raiz_mmr",
+        "_timestamp", "_id", "dificuldade", "nonce", "assinatura", "hash", "certificado",
+    )
+
+    def __init__(self, transacao: Transacao, hash_anterior: bytes, minerador: UUID,
+                 raiz_mmr: Optional[bytes] = None) -> None:
         self.transacao = transacao
         self.minerador = minerador
         self.hash_anterior = hash_anterior
-        self.timestamp: datetime.datetime = datetime.datetime.now()
-        self.id: UUID = uuid4()
+        self.raiz_mmr = raiz_mmr
+        self.timestamp = datetime.datetime.now()
+        self._id = uuid4().bytes
+        self.dificuldade = 0
+        self.nonce = 0
 
         self.assinatura = None
         self.hash = None
+        self.certificado: Optional["CertificadoQuorum"] = None
+
+    def __setattr__(self, nome: str, valor) -> None:
+        if getattr(self, "assinatura", None) is not None:
+            # o certificado pode ser anexado uma única vez após a assinatura
+            if nome != "certificado" or getattr(self, "certificado", None) is not None:
+                raise AttributeError("Bloco assinado não pode ser alterado")
+        object.__setattr__(self, nome, valor)
+
+    def __getstate__(self) -> dict:
+        return {nome: getattr(self, nome) for nome in self.__slots__ if hasattr(self, nome)}
+
+    def __setstate__(self, estado: dict) -> None:
+        # ignora a imutabilidade, pois o objeto está sendo reconstruído já assinado
+        object.__setattr__(self, "dificuldade", 0)
+        object.__setattr__(self, "nonce", 0)
+        for nome, valor in estado.items():
+            object.__setattr__(self, nome, valor)
+
+    @property
+    def minerador(self) -> UUID:
+        return UUID(bytes=self._minerador)
+
+    @minerador.setter
+    def minerador(self, valor: UUID) -> None:
+        self._minerador = internar_id(valor)
+
+    @property
+    def timestamp(self) -> datetime.datetime:
+        return _EPOCA + self._timestamp * _MICROSSEGUNDO
+
+    @timestamp.setter
+    def timestamp(self, valor: datetime.datetime) -> None:
+        self._timestamp = (valor - _EPOCA) // _MICROSSEGUNDO
+
+    @property
+    def timestamp_us(self) -> int:
+        """Timestamp em microssegundos inteiros, sem conversão para datetime."""
+        return self._timestamp
+
+    @property
+    def id(self) -> UUID:
+        return UUID(bytes=self._id)
+
+    @id.setter
+    def id(self, valor: UUID) -> None:
+        self._id = valor.bytes
+
+    def cabecalho(self) -> bytes:
+        """Bytes cobertos pelo hash, exceto o nonce, que é acrescentado ao final."""
+        partes = [
+            str(self.transacao.hash).encode('utf-8'),
+            self.hash_anterior,
+            str(self.timestamp).encode('utf-8'),
+            str(self.minerador).encode('utf-8'),
+        ]
+        if self.raiz_mmr is not None:
+            partes.append(self.raiz_mmr)
+        if self.dificuldade:
+            partes.append(self.dificuldade.to_bytes(1, "big"))
+        return b"".join(partes)
 
     def calcular_hash(self) -> bytes:
-        digest = hashlib.sha256()
-        digest.update(str(self.transacao.hash).encode('utf-8'))
-        digest.update(self.hash_anterior)
-        digest.update(str(self.timestamp).encode('utf-8'))
-        digest.update(str(self.minerador).encode('utf-8'))
+        digest = hashlib.sha256(self.cabecalho())
+        if self.dificuldade:
+            digest.update(self.nonce.to_bytes(8, "big"))
         return digest.digest()
 
+    def prova_trabalho_valida(self, dificuldade_minima: int = 0) -> bool:
+        """
+        Verifica em O(1) a prova de trabalho declarada pelo bloco, sem recalcular o hash.
+        A correspondência entre o hash e o conteúdo é verificada em `validar`.
+        """
+        if self.dificuldade < dificuldade_minima:
+            return False
+        if self.dificuldade == 0:
+            return True
+        return self.hash is not None and atende_dificuldade(self.hash, self.dificuldade)
+
     def assinar(self, chave_privada: RSAPrivateKey) -> None:
         """Assina o bloco e gera o hash"""
         self.hash = self.calcular_hash()
@@ -0,0 +1,126 @@
+import hashlib
+from uuid import UUID
+from concurrent.futures import ThreadPoolExecutor
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey, RSAPrivateKey
+from typing import AbstractSet, Iterable, List, Mapping, Optional
+
+
+def digest_eleitorado(eleitores: Iterable[UUID]) -> bytes:
+    """Resumo do eleitorado, independente da ordem dos eleitores."""
+    digest = hashlib.sha256(b"eleitorado")
+    for eleitor in sorted(eleitor.bytes for eleitor in eleitores):
+        digest.update(eleitor)
+    return digest.digest()
+
+
+class Voto:
+    """
+    Classe que representa o voto assinado de um usuário sobre um bloco,
+    emitido para um eleitorado específico, identificado pelo seu resumo
+    """
+    __slots__ = ("eleitor", "hash_bloco", "eleitorado", "decisao", "motivo", "assinatura")
+
+    def __init__(self, eleitor: UUID, hash_bloco: bytes, eleitorado: bytes, decisao: bool,
+                 motivo: str) -> None:
+        self.eleitor = eleitor
+        self.hash_bloco = hash_bloco
+        self.eleitorado = eleitorado
+        self.decisao = decisao
+        self.motivo = motivo
+        self.assinatura: Optional[bytes] = None
+
+    def mensagem(self) -> bytes:
+        """Conteúdo coberto pela assinatura: bloco, eleitorado, eleitor e decisão."""
+        digest = hashlib.sha256()
+        digest.update(b"voto")
+        digest.update(self.hash_bloco)
+        digest.update(self.eleitorado)
+        digest.update(self.eleitor.bytes)
+        digest.update(b"\x01" if self.decisao else b"\x00")
+        return digest.digest()
+
+    def assinar(self, chave_privada: RSAPrivateKey) -> None:
+        """Assina o voto com a chave privada do eleitor"""
+        self.assinatura = chave_privada.sign(
+            self.mensagem(),
+            padding.PSS(
+                mgf=padding.MGF1(hashes.SHA256()),
+                salt_length=padding.PSS.MAX_LENGTH
+            ),
+            hashes.SHA256()
+        )
+
+    def validar(self, chave_publica: RSAPublicKey) -> bool:
+        """
+        Verifica a assinatura do voto
+        """
+        if self.assinatura is None:
+            return False
+
+        try:
+            chave_publica.verify(
+                self.assinatura,
+                self.mensagem(),
+                padding.PSS(
+                    mgf=padding.MGF1(hashes.SHA256()),
+                    salt_length=padding.PSS.MAX_LENGTH
+                ),
+                hashes.SHA256()
+            )
+            return True
+        except Exception:
+            return False
+
+
+class CertificadoQuorum:
+    """
+    Certificado de quórum anexado a um bloco aprovado.
+    Reúne os votos assinados coletados no consenso e os IDs do eleitorado,
+    permitindo provar a aprovação pela maioria sem refazer a votação.
+    A lista de eleitores é apenas declarada: quem verifica informa o eleitorado
+    esperado, obtido da própria cadeia, e cada voto assina o resumo desse eleitorado.
+    """
+    __slots__ = ("hash_bloco", "votos", "eleitores")
+
+    def __init__(self, hash_bloco: bytes, votos: List[Voto], eleitores: List[UUID]) -> None:
+        self.hash_bloco = hash_bloco
+        self.votos = votos
+        self.eleitores = eleitores
+
+    @property
+    def necessario(self) -> int:
+        return (len(self.eleitores) // 2) + 1
+
+    @property
+    def favoraveis(self) -> int:
+        return sum(1 for voto in self.votos if voto.decisao)
+
+    def verificar(self, hash_bloco: bytes, eleitorado: AbstractSet[UUID],
+                  chaves: Mapping[UUID, RSAPublicKey], max_threads: Optional[int] = None) -> bool:
+        """
+        Verifica o certificado em uma única passada: o eleitorado declarado é
+        exatamente o esperado, os votos pertencem ao bloco e a esse eleitorado,
+        vêm de eleitores distintos, alcançam a maioria e têm assinaturas válidas,
+        que são verificadas em paralelo.
+        """
+        if self.hash_bloco != hash_bloco:
+            return False
+        if len(self.eleitores) != len(eleitorado) or set(self.eleitores) != eleitorado:
+            return False
+
+        resumo = digest_eleitorado(eleitorado)
+        vistos = set()
+        for voto in self.votos:
+            if voto.hash_bloco != hash_bloco or voto.eleitorado != resumo or voto.eleitor not in eleitorado:
+                return False
+            if voto.eleitor in vistos or voto.eleitor not in chaves:
+                return False
+            vistos.add(voto.eleitor)
+
+        if self.favoraveis < self.necessario:
+            return False
+
+        with ThreadPoolExecutor(max_workers=max_threads) as executor:
+            return all(executor.map(lambda voto: voto.validar(chaves[voto.eleitor]), self.votos))
@@ -0,0 +1,217 @@
+import os
+import json
+import numpy as np
+from src.bloco import Bloco
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+COLUNAS = (
+    "altura",
+    "id_bloco",
+    "minerador",
+    "remetente",
+    "destinatario",
+    "pontos",
+    "timestamp",
+    "hash",
+)
+
+# colunas de IDs, guardadas como matrizes (n, 16) de bytes
+COLUNAS_ID = ("id_bloco", "minerador", "remetente", "destinatario")
+TAMANHO_ID = 16
+TAMANHO_HASH = 32
+
+
+# tipo e largura de cada coluna; colunas com largura são matrizes (n, largura)
+TIPOS: Dict[str, Tuple[type, int]] = {
+    "altura": (np.int64, 0),
+    "pontos": (np.float64, 0),
+    "timestamp": (np.int64, 0),
+    "hash": (np.uint8, TAMANHO_HASH),
+    # blocos ainda não assinados não têm hash
+    "hash_valido": (bool, 0),
+    **{nome: (np.uint8, TAMANHO_ID) for nome in COLUNAS_ID},
+}
+
+
+def alocar(linhas: int, dtype, largura: int = 0, caminho: Optional[str] = None,
+           manter: bool = False) -> np.ndarray:
+    """
+    Aloca um array zerado com `linhas` linhas (e `largura` colunas, se positiva).
+    Com um caminho, o array é mapeado em um arquivo binário (np.memmap) em vez de
+    ocupar a memória do processo; com `manter`, o conteúdo já gravado no arquivo
+    é preservado e apenas o trecho novo é zerado.
+    """
+    forma = (linhas, largura) if largura else (linhas,)
+    if caminho is None:
+        return np.zeros(forma, dtype=dtype)
+    if linhas < 1:
+        raise ValueError("Um array em arquivo precisa de pelo menos uma linha")
+    with open(caminho, "r+b" if manter else "wb") as arquivo:
+        arquivo.truncate(int(np.prod(forma)) * np.dtype(dtype).itemsize)
+    return np.memmap(caminho, dtype=dtype, mode="r+", shape=forma)
+
+
+def crescer(array: np.ndarray, tamanho: int, caminho: Optional[str] = None) -> np.ndarray:
+    """
+    Retorna o array com capacidade para pelo menos `tamanho` linhas, dobrando se preciso.
+    Arrays em arquivo crescem no próprio arquivo, sem copiar as linhas existentes.
+    """
+    if tamanho <= len(array):
+        return array
+    capacidade = max(tamanho, 2 * len(array))
+    largura = array.shape[1] if array.ndim == 2 else 0
+    if caminho is not None:
+        array.flush()
+        return alocar(capacidade, array.dtype, largura, caminho, manter=True)
+    novo = alocar(capacidade, array.dtype, largura)
+    novo[:len(array)] = array
+    return novo
+
+
+def colunas_vazias(capacidade: int, diretorio: Optional[str] = None,
+                   manter: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Cria as colunas tipadas com capacidade para `capacidade` blocos.
+    Com um diretório, cada coluna é mapeada em um arquivo `<nome>.bin` dentro dele,
+    e com `manter` as linhas já gravadas nos arquivos são preservadas.
+    """
+    return {
+        nome: alocar(capacidade, dtype, largura, _caminho_coluna(diretorio, nome), manter)
+        for nome, (dtype, largura) in TIPOS.items()
+    }
+
+
+def ler_estado(diretorio: Optional[str]) -> Optional[dict]:
+    """Lê o estado gravado com `gravar_estado` no diretório, ou None se não houver."""
+    if diretorio is None:
+        return None
+    caminho = os.path.join(diretorio, "estado.json")
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, "r", encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def gravar_estado(diretorio: str, arrays: Iterable[np.ndarray], estado: dict) -> None:
+    """
+    Descarrega os arrays em arquivo para o disco e só então grava o estado
+    (quantidade de linhas válidas, capacidade...) que permite retomá-los ao reabrir.
+    A escrita é feita em um arquivo temporário e renomeada, para não deixar estados parciais.
+    """
+    for array in arrays:
+        array.flush()
+    caminho = os.path.join(diretorio, "estado.json")
+    with open(caminho + ".tmp", "w", encoding="utf-8") as arquivo:
+        json.dump(estado, arquivo)
+    os.replace(caminho + ".tmp", caminho)
+
+
+def _caminho_coluna(diretorio: Optional[str], nome: str) -> Optional[str]:
+    return None if diretorio is None else os.path.join(diretorio, nome + ".bin")
+
+
+def _preencher(colunas: Dict[str, np.ndarray], posicao: int, altura: int, bloco: Bloco) -> None:
+    transacao = bloco.transacao
+    colunas["altura"][posicao] = altura
+    colunas["id_bloco"][posicao] = np.frombuffer(bloco.id.bytes, dtype=np.uint8)
+    colunas["minerador"][posicao] = np.frombuffer(bloco.minerador.bytes, dtype=np.uint8)
+    colunas["remetente"][posicao] = np.frombuffer(transacao.remetente.bytes, dtype=np.uint8)
+    colunas["destinatario"][posicao] = np.frombuffer(transacao.destinatario.bytes, dtype=np.uint8)
+    colunas["pontos"][posicao] = transacao.pontos
+    colunas["timestamp"][posicao] = bloco.timestamp_us
+    if bloco.hash is not None:
+        colunas["hash"][posicao] = np.frombuffer(bloco.hash, dtype=np.uint8)
+        colunas["hash_valido"][posicao] = True
+
+
+def colunas_de_blocos(blocos: Sequence[Bloco], inicio: int) -> Dict[str, np.ndarray]:
+    """Converte uma sequência de blocos, a partir da altura `inicio`, em colunas tipadas."""
+    colunas = colunas_vazias(len(blocos))
+    for posicao, bloco in enumerate(blocos):
+        _preencher(colunas, posicao, inicio + posicao, bloco)
+    return colunas
+
+
+def como_bytes(matriz: np.ndarray) -> List[bytes]:
+    """Converte uma coluna de IDs ou hashes em uma lista de objetos bytes, um por linha."""
+    return [linha.tobytes() for linha in matriz]
+
+
+class CacheColunar:
+    """
+    Cache da cadeia organizado em colunas tipadas do NumPy.
+    É atualizado de forma incremental, acrescentando apenas os blocos
+    posteriores à última altura já copiada, e a capacidade dobra quando esgota.
+    IDs são guardados como 16 bytes, hashes como 32 bytes
+    e o timestamp como microssegundos inteiros.
+    Com um diretório, as colunas ficam em arquivos mapeados em memória, de modo
+    que o cache não ocupa memória do processo por bloco, e são retomadas ao abrir
+    a partir da quantidade de linhas gravada no estado do diretório.
+    """
+
+    # blocos lidos da cadeia por vez, para não carregar uma cadeia em arquivo inteira
+    LOTE = 1024
+
+    def __init__(self, capacidade: int = 64, diretorio: Optional[str] = None) -> None:
+        if diretorio is not None:
+            os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self._n = 0
+        estado = ler_estado(diretorio)
+        if estado is None:
+            self._colunas = colunas_vazias(capacidade, diretorio)
+        else:
+            self._n = estado["n"]
+            self._colunas = colunas_vazias(estado["capacidade"], diretorio, manter=True)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _reservar(self, tamanho: int) -> None:
+        for nome in self._colunas:
+            self._colunas[nome] = crescer(
+                self._colunas[nome], tamanho, _caminho_coluna(self.diretorio, nome)
+            )
+
+    def atualizar(self, cadeia: Sequence[Bloco]) -> int:
+        """
+        Copia para as colunas os blocos ainda não presentes no cache.
+        Retorna a quantidade de blocos acrescentados.
+        """
+        inicio = self._n
+        self._reservar(len(cadeia))
+        for lote in range(inicio, len(cadeia), self.LOTE):
+            for posicao, bloco in enumerate(cadeia[lote:lote + self.LOTE], start=lote):
+                _preencher(self._colunas, posicao, posicao, bloco)
+            self._n = min(lote + self.LOTE, len(cadeia))
+        if self._n != inicio:
+            self._gravar_estado()
+        return self._n - inicio
+
+    def _gravar_estado(self) -> None:
+        if self.diretorio is not None:
+            gravar_estado(
+                self.diretorio,
+                self._colunas.values(),
+                {"n": self._n, "capacidade": len(self._colunas["altura"])},
+            )
+
+    def retomar(self, cadeia: Sequence[Bloco]) -> int:
+        """
+        Confere as linhas retomadas do disco com a cadeia: se a última linha
+        não corresponder ao bloco da mesma altura, o cache volta a ficar vazio.
+        Retorna a quantidade de linhas mantidas.
+        """
+        n = self._n
+        if n > len(cadeia) or (
+            n > 0 and self._colunas["hash"][n - 1].tobytes() != cadeia[n - 1].hash
+        ):
+            self._n = 0
+            self._gravar_estado()
+        return self._n
+
+    def fatia(self, inicio: int, fim: int) -> Dict[str, np.ndarray]:
+        """Retorna uma cópia das colunas restritas às alturas em [inicio, fim)."""
+        fim = min(fim, self._n)
+        # np.array devolve arrays comuns mesmo quando as colunas estão em arquivo
+        return {nome: np.array(valores[inicio:fim]) for nome, valores in self._colunas.items()}
@@ -0,0 +1,108 @@
+import os
+from uuid import UUID
+from types import MappingProxyType
+from bisect import bisect_right
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+
+class HistoricoEleitorado:
+    """
+    Histórico do conjunto de usuários ativos da cadeia, em versões indexadas
+    pela altura a partir da qual valem. Permite saber quem podia votar em
+    qualquer bloco, sem confiar na lista de eleitores declarada no certificado.
+    Uma nova versão só é criada quando o conjunto muda (registro, banimento ou
+    desbanimento), e versões criadas na mesma altura substituem a anterior.
+    Com um caminho, as versões são acrescentadas a um arquivo e recarregadas ao reabrir.
+    """
+
+    def __init__(self, caminho: Optional[str] = None) -> None:
+        self.caminho = caminho
+        self._alturas: List[int] = []
+        self._versoes: List[FrozenSet[UUID]] = []
+        if caminho is not None and os.path.exists(caminho):
+            with open(caminho, "r", encoding="utf-8") as arquivo:
+                for linha in arquivo:
+                    altura, *ids = linha.split()
+                    self._guardar(int(altura), frozenset(UUID(hex=i) for i in ids))
+
+    def __len__(self) -> int:
+        return len(self._versoes)
+
+    def _guardar(self, altura: int, ativos: FrozenSet[UUID]) -> None:
+        if self._alturas and altura < self._alturas[-1]:
+            raise ValueError("Versões do eleitorado devem ser registradas em ordem de altura")
+        if self._alturas and self._alturas[-1] == altura:
+            self._versoes[-1] = ativos
+        else:
+            self._alturas.append(altura)
+            self._versoes.append(ativos)
+
+    def registrar(self, altura: int, ativos: Iterable[UUID]) -> None:
+        """Registra o conjunto de usuários ativos a partir da altura informada."""
+        ativos = frozenset(ativos)
+        if self._versoes and self._versoes[-1] == ativos:
+            return
+        self._guardar(altura, ativos)
+        if self.caminho is not None:
+            with open(self.caminho, "a", encoding="utf-8") as arquivo:
+                arquivo.write(" ".join([str(altura)] + sorted(u.hex for u in ativos)) + "\n")
+
+    def em(self, altura: int) -> FrozenSet[UUID]:
+        """Retorna os usuários ativos ao efetivar o bloco na altura informada."""
+        indice = bisect_right(self._alturas, altura) - 1
+        return self._versoes[indice] if indice >= 0 else frozenset()
+
+    def versoes(self) -> List[Tuple[int, FrozenSet[UUID]]]:
+        return list(zip(self._alturas, self._versoes))
+
+
+class RegistroChaves:
+    """
+    Chaves públicas de todos os usuários que já foram registrados na cadeia,
+    inclusive os banidos depois, usadas para verificar os votos dos certificados.
+    Um ID registrado não pode trocar de chave, senão votos antigos poderiam ser forjados.
+    Com um caminho, cada chave nova é acrescentada ao arquivo (ID e chave DER em
+    hexadecimal) e recarregada ao reabrir, de modo que a cadeia possa ser verificada
+    sem os usuários em memória.
+    """
+
+    def __init__(self, caminho: Optional[str] = None) -> None:
+        self.caminho = caminho
+        self._chaves: Dict[UUID, RSAPublicKey] = {}
+        self._der: Dict[UUID, bytes] = {}
+        if caminho is not None and os.path.exists(caminho):
+            with open(caminho, "r", encoding="utf-8") as arquivo:
+                for linha in arquivo:
+                    usuario_id, der = linha.split()
+                    self._guardar(UUID(hex=usuario_id), bytes.fromhex(der))
+
+    def __len__(self) -> int:
+        return len(self._chaves)
+
+    def __contains__(self, usuario_id: UUID) -> bool:
+        return usuario_id in self._chaves
+
+    def _guardar(self, usuario_id: UUID, der: bytes) -> None:
+        self._der[usuario_id] = der
+        self._chaves[usuario_id] = serialization.load_der_public_key(der)
+
+    def registrar(self, usuario_id: UUID, chave: RSAPublicKey) -> None:
+        """Registra a chave pública do usuário. Lança ValueError se o ID já tiver outra chave."""
+        der = chave.public_bytes(
+            serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        atual = self._der.get(usuario_id)
+        if atual == der:
+            return
+        if atual is not None:
+            raise ValueError("O usuário já está registrado com outra chave pública")
+        self._guardar(usuario_id, der)
+        if self.caminho is not None:
+            with open(self.caminho, "a", encoding="utf-8") as arquivo:
+                arquivo.write(f"{usuario_id.hex} {der.hex()}\n")
+
+    def chaves(self) -> Mapping[UUID, RSAPublicKey]:
+        """Retorna uma visão somente leitura das chaves, por ID de usuário."""
+        return MappingProxyType(self._chaves)
@@ -0,0 +1,216 @@
+import os
+import json
+import hashlib
+from uuid import UUID
+from src.bloco import Bloco
+from typing import Dict, Iterable, List, Optional, Set, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.blockchain import Blockchain
+
+
+def derivar_saldos(blocos: Iterable[Bloco], saldos_iniciais: Dict[UUID, float]) -> Dict[UUID, float]:
+    """
+    Reconstrói os saldos reproduzindo as transações dos blocos,
+    a partir de um conjunto de saldos iniciais.
+    """
+    saldos = dict(saldos_iniciais)
+    for bloco in blocos:
+        transacao = bloco.transacao
+        if transacao.remetente == UUID(int=0):
+            continue
+        saldos[transacao.remetente] = saldos.get(transacao.remetente, 0.0) - transacao.pontos
+        saldos[transacao.destinatario] = saldos.get(transacao.destinatario, 0.0) + transacao.pontos
+    return saldos
+
+
+def hash_estado(altura: int, saldos: Dict[UUID, float]) -> bytes:
+    """
+    Calcula o hash do estado de saldos em uma altura da cadeia.
+    Os saldos são ordenados por ID para que o hash seja determinístico.
+    """
+    digest = hashlib.sha256()
+    digest.update(altura.to_bytes(8, "big"))
+    for usuario_id in sorted(saldos):
+        digest.update(usuario_id.bytes)
+        digest.update(repr(saldos[usuario_id]).encode("utf-8"))
+    return digest.digest()
+
+
+def reproduzir_saldos(blockchain: "Blockchain", snapshot: Optional["Snapshot"] = None) -> int:
+    """
+    Define os saldos de todos os usuários registrados a partir do snapshot,
+    ou dos saldos iniciais se não houver snapshot, reproduzindo os blocos seguintes.
+    Usuários registrados depois do snapshot partem dos seus saldos iniciais.
+    Lança ValueError se o snapshot ou os blocos reproduzidos citarem usuários
+    que não estão registrados, pois seus saldos seriam perdidos.
+    Retorna a quantidade de blocos reproduzidos.
+    """
+    registrados: Set[UUID] = {usuario.id for usuario in blockchain.todos_usuarios}
+    altura = 1
+    saldos = dict(blockchain.saldos_iniciais)
+    if snapshot is not None:
+        desconhecidos = set(snapshot.saldos) - registrados
+        if desconhecidos:
+            raise ValueError(
+                f"O snapshot da altura {snapshot.altura} tem {len(desconhecidos)} "
+                "usuário(s) não registrado(s) na blockchain"
+            )
+        altura = snapshot.altura
+        saldos.update(snapshot.saldos)
+
+    saldos = derivar_saldos(blockchain.cadeia[altura:], saldos)
+    desconhecidos = set(saldos) - registrados
+    if desconhecidos:
+        raise ValueError(
+            f"A cadeia tem transações de {len(desconhecidos)} usuário(s) não registrado(s) na blockchain"
+        )
+    for usuario in blockchain.todos_usuarios:
+        usuario.pontos = saldos[usuario.id]
+
+    return len(blockchain.cadeia) - altura
+
+
+class RegistroUsuarios:
+    """
+    Registro em arquivo dos usuários de uma cadeia, com o ID, o nome, o saldo
+    inicial e a chave privada em PEM, um usuário por linha em JSON.
+    Permite recriar os mesmos usuários ao reabrir a cadeia, já que os saldos
+    dos snapshots e as transações dos blocos se referem a eles pelo ID.
+    """
+
+    def __init__(self, caminho: str) -> None:
+        self.caminho = caminho
+        self._registros: Dict[UUID, dict] = {}
+        if os.path.exists(caminho):
+            with open(caminho, "r", encoding="utf-8") as arquivo:
+                for linha in arquivo:
+                    dados = json.loads(linha)
+                    self._registros[UUID(dados["id"])] = dados
+
+    def __len__(self) -> int:
+        return len(self._registros)
+
+    def __contains__(self, usuario_id: UUID) -> bool:
+        return usuario_id in self._registros
+
+    def registrar(self, dados: dict) -> None:
+        """Acrescenta o registro de um usuário, ignorando IDs já registrados."""
+        usuario_id = UUID(dados["id"])
+        if usuario_id in self._registros:
+            return
+        self._registros[usuario_id] = dados
+        with open(self.caminho, "a", encoding="utf-8") as arquivo:
+            arquivo.write(json.dumps(dados) + "\n")
+
+    def registros(self) -> List[dict]:
+        """Retorna os registros na ordem em que os usuários foram registrados."""
+        return list(self._registros.values())
+
+
+class Snapshot:
+    """
+    Classe que representa um snapshot dos saldos em uma altura da cadeia
+    """
+    def __init__(self, altura: int, hash_bloco: bytes, saldos: Dict[UUID, float]) -> None:
+        self.altura = altura
+        self.hash_bloco = hash_bloco
+        self.saldos = saldos
+        self.hash_estado = hash_estado(altura, saldos)
+
+    def para_dict(self) -> dict:
+        return {
+            "altura": self.altura,
+            "hash_bloco": self.hash_bloco.hex(),
+            "hash_estado": self.hash_estado.hex(),
+            "saldos": {str(usuario_id): pontos for usuario_id, pontos in self.saldos.items()},
+        }
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "Snapshot":
+        saldos = {UUID(usuario_id): pontos for usuario_id, pontos in dados["saldos"].items()}
+        snapshot = cls(dados["altura"], bytes.fromhex(dados["hash_bloco"]), saldos)
+        if snapshot.hash_estado.hex() != dados["hash_estado"]:
+            raise ValueError(f"Snapshot da altura {snapshot.altura} corrompido: hash de estado incorreto")
+        return snapshot
+
+
+class GerenciadorSnapshots:
+    """
+    Grava snapshots periódicos dos saldos em disco e restaura o estado
+    a partir do snapshot mais recente, reproduzindo apenas os blocos seguintes.
+    """
+    def __init__(self, diretorio: str, intervalo: int = 100) -> None:
+        if intervalo < 1:
+            raise ValueError("O intervalo entre snapshots deve ser positivo")
+        self.diretorio = diretorio
+        self.intervalo = intervalo
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, altura: int) -> str:
+        return os.path.join(self.diretorio, f"snapshot-{altura:012d}.json")
+
+    def alturas(self) -> List[int]:
+        """Retorna as alturas dos snapshots gravados, em ordem crescente."""
+        alturas = []
+        for nome in os.listdir(self.diretorio):
+            if nome.startswith("snapshot-") and nome.endswith(".json"):
+                alturas.append(int(nome[len("snapshot-"):-len(".json")]))
+        return sorted(alturas)
+
+    def salvar(self, blockchain: "Blockchain") -> Snapshot:
+        """
+        Grava um snapshot com os saldos atuais na altura atual da cadeia.
+        A escrita é feita em um arquivo temporário e renomeada, para não deixar snapshots parciais.
+        """
+        altura = len(blockchain.cadeia)
+        snapshot = Snapshot(altura, blockchain.ultimo_bloco().hash, blockchain.saldos())
+
+        caminho = self._caminho(altura)
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump(snapshot.para_dict(), arquivo)
+        os.replace(temporario, caminho)
+        return snapshot
+
+    def talvez_salvar(self, blockchain: "Blockchain") -> Optional[Snapshot]:
+        """Grava um snapshot se a altura atual for múltipla do intervalo configurado."""
+        if len(blockchain.cadeia) % self.intervalo == 0:
+            return self.salvar(blockchain)
+        return None
+
+    def carregar(self, altura: int) -> Snapshot:
+        with open(self._caminho(altura), "r", encoding="utf-8") as arquivo:
+            return Snapshot.de_dict(json.load(arquivo))
+
+    def ultimo(self) -> Optional[Snapshot]:
+        """
+        Retorna o snapshot mais recente.
+        Se não houver nenhum, retorna None.
+        """
+        alturas = self.alturas()
+        if not alturas:
+            return None
+        return self.carregar(alturas[-1])
+
+    def compativel(self, blockchain: "Blockchain") -> Optional[Snapshot]:
+        """
+        Retorna o snapshot mais recente cujo bloco está na cadeia atual.
+        Se não houver nenhum, retorna None.
+        """
+        for altura in reversed(self.alturas()):
+            if altura > len(blockchain.cadeia):
+                continue
+            candidato = self.carregar(altura)
+            if blockchain.cadeia[altura - 1].hash == candidato.hash_bloco:
+                return candidato
+        return None
+
+    def restaurar(self, blockchain: "Blockchain") -> int:
+        """
+        Restaura os saldos dos usuários a partir do snapshot mais recente compatível
+        com a cadeia e reproduz apenas os blocos posteriores a ele.
+        Lança ValueError se o snapshot não corresponder aos usuários registrados.
+        Retorna a quantidade de blocos reproduzidos.
+        """
+        return reproduzir_saldos(blockchain, self.compativel(blockchain))
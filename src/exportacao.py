@@ -0,0 +1,100 @@
+import os
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.bloco import Bloco
+from typing import Dict, List, Optional, Sequence, Tuple
+from src.colunas import COLUNAS_ID, TAMANHO_HASH, TAMANHO_ID, colunas_de_blocos
+
+ESQUEMA = pa.schema(
+    [
+        ("altura", pa.int64()),
+        ("id_bloco", pa.binary(16)),
+        ("minerador", pa.binary(16)),
+        ("remetente", pa.binary(16)),
+        ("destinatario", pa.binary(16)),
+        ("pontos", pa.float64()),
+        ("timestamp", pa.timestamp("us")),
+        ("hash", pa.binary()),
+    ]
+)
+
+
+def _binario_fixo(matriz: np.ndarray, largura: int, validos: Optional[np.ndarray] = None) -> pa.Array:
+    """Cria um array Arrow de binários de tamanho fixo sobre o buffer da matriz, sem cópia."""
+    mascara = None if validos is None else pa.array(validos, type=pa.bool_()).buffers()[1]
+    return pa.FixedSizeBinaryArray.from_buffers(
+        pa.binary(largura), len(matriz), [mascara, pa.py_buffer(np.ascontiguousarray(matriz))]
+    )
+
+
+def para_tabela(colunas: Dict[str, np.ndarray]) -> pa.Table:
+    """Converte colunas tipadas (de `CacheColunar.fatia` ou `colunas_de_blocos`) em uma tabela Arrow."""
+    arrays = {
+        "altura": pa.array(colunas["altura"], type=pa.int64()),
+        "pontos": pa.array(colunas["pontos"], type=pa.float64()),
+        "timestamp": pa.array(colunas["timestamp"], type=pa.timestamp("us")),
+        "hash": _binario_fixo(colunas["hash"], TAMANHO_HASH, colunas["hash_valido"]).cast(pa.binary()),
+    }
+    for nome in COLUNAS_ID:
+        arrays[nome] = _binario_fixo(colunas[nome], TAMANHO_ID)
+    return pa.Table.from_arrays([arrays[campo.name] for campo in ESQUEMA], schema=ESQUEMA)
+
+
+class ExportadorParquet:
+    """
+    Exporta a cadeia para um diretório de arquivos Parquet.
+    Cada exportação grava uma nova parte contendo apenas os blocos posteriores
+    à última altura exportada, lidos da cadeia e escritos em lotes, de modo que
+    apenas um lote de blocos fica em memória por vez.
+    """
+
+    def __init__(self, diretorio: str, tamanho_lote: int = 10_000) -> None:
+        if tamanho_lote < 1:
+            raise ValueError("O tamanho do lote deve ser positivo")
+        self.diretorio = diretorio
+        self.tamanho_lote = tamanho_lote
+        os.makedirs(diretorio, exist_ok=True)
+
+    def partes(self) -> List[Tuple[int, int]]:
+        """Retorna os intervalos [inicio, fim) de alturas de cada parte exportada."""
+        partes = []
+        for nome in os.listdir(self.diretorio):
+            if nome.startswith("parte-") and nome.endswith(".parquet"):
+                inicio, fim = nome[len("parte-"):-len(".parquet")].split("-")
+                partes.append((int(inicio), int(fim)))
+        return sorted(partes)
+
+    def ultima_altura(self) -> int:
+        """Retorna a altura seguinte ao último bloco exportado."""
+        partes = self.partes()
+        return partes[-1][1] if partes else 0
+
+    def exportar(self, cadeia: Sequence[Bloco]) -> int:
+        """
+        Grava os blocos da cadeia ainda não exportados.
+        Retorna a quantidade de blocos exportados.
+        """
+        inicio = self.ultima_altura()
+        fim = len(cadeia)
+        if fim <= inicio:
+            return 0
+
+        caminho = os.path.join(self.diretorio, f"parte-{inicio:012d}-{fim:012d}.parquet")
+        temporario = caminho + ".tmp"
+        with pq.ParquetWriter(temporario, ESQUEMA) as escritor:
+            for lote in range(inicio, fim, self.tamanho_lote):
+                blocos = cadeia[lote:min(lote + self.tamanho_lote, fim)]
+                escritor.write_table(para_tabela(colunas_de_blocos(blocos, lote)))
+        os.replace(temporario, caminho)
+        return fim - inicio
+
+    def ler(self) -> pa.Table:
+        """Lê todas as partes exportadas como uma única tabela Arrow."""
+        caminhos = [
+            os.path.join(self.diretorio, f"parte-{inicio:012d}-{fim:012d}.parquet")
+            for inicio, fim in self.partes()
+        ]
+        if not caminhos:
+            return ESQUEMA.empty_table()
+        return pa.concat_tables([pq.read_table(caminho, schema=ESQUEMA) for caminho in caminhos])
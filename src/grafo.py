@@ -0,0 +1,220 @@
+import heapq
+import numpy as np
+from uuid import UUID
+from typing import Dict, List, Optional, Set, Tuple
+
+
+def _crescer(array: np.ndarray, tamanho: int, preenchimento=0) -> np.ndarray:
+    """Retorna o array com capacidade para pelo menos `tamanho` posições, dobrando se preciso."""
+    if tamanho <= len(array):
+        return array
+    novo = np.full(max(tamanho, 2 * len(array)), preenchimento, dtype=array.dtype)
+    novo[:len(array)] = array
+    return novo
+
+
+class VisaoGrafo:
+    """
+    Visão imutável do grafo pronta para o renderizador, gerada uma vez por versão.
+    `nos` são os IDs dos usuários, e as arestas são arrays paralelos com as
+    posições dos extremos em `nos`, a contagem e o volume; `grau` traz o grau de cada nó.
+    Como uma nova visão só é criada quando o grafo muda, o renderizador pode
+    guardar o que deriva dela (layout, coordenadas) enquanto recebe a mesma visão.
+    """
+    __slots__ = ("versao", "nos", "origem", "destino", "contagem", "volume", "grau")
+
+    def __init__(self, versao: int, nos: List[UUID], origem: np.ndarray, destino: np.ndarray,
+                 contagem: np.ndarray, volume: np.ndarray, grau: np.ndarray) -> None:
+        self.versao = versao
+        self.nos = nos
+        self.origem = origem
+        self.destino = destino
+        self.contagem = contagem
+        self.volume = volume
+        self.grau = grau
+
+    def __len__(self) -> int:
+        return len(self.origem)
+
+
+class GrafoComunidade:
+    """
+    Grafo não direcionado da comunidade, em que cada par de usuários que
+    transacionou é uma única aresta com a quantidade de transações e o volume.
+    As arestas ficam em arrays indexados por inteiros, prontos para exportação CSR,
+    e cada usuário tem sua lista de adjacência (vizinho -> aresta), de modo que
+    consultas por usuário custam O(grau). Graus, componentes conexos (union-find)
+    e o vizinho de maior volume de cada usuário são mantidos incrementalmente
+    a cada transação registrada.
+    """
+
+    def __init__(self) -> None:
+        self._slots: Dict[UUID, int] = {}
+        self._ids: List[UUID] = []
+        self._adjacencia: List[Dict[int, int]] = []
+        self._quantidade_arestas = 0
+
+        self._origem = np.zeros(64, dtype=np.int64)
+        self._destino = np.zeros(64, dtype=np.int64)
+        self._contagem = np.zeros(64, dtype=np.int64)
+        self._volume = np.zeros(64, dtype=np.float64)
+
+        self._grau = np.zeros(16, dtype=np.int64)
+        self._pai = np.zeros(16, dtype=np.int64)
+        self._melhor_vizinho = np.full(16, -1, dtype=np.int64)
+        self._melhor_volume = np.zeros(16, dtype=np.float64)
+        self.quantidade_componentes = 0
+
+        self.versao = 0
+        self._visao: Optional[VisaoGrafo] = None
+
+    def __len__(self) -> int:
+        return self._quantidade_arestas
+
+    def __bool__(self) -> bool:
+        return self._quantidade_arestas > 0
+
+    def __contains__(self, usuario_id: UUID) -> bool:
+        return usuario_id in self._slots
+
+    def _slot(self, usuario_id: UUID) -> int:
+        slot = self._slots.get(usuario_id)
+        if slot is None:
+            slot = len(self._ids)
+            self._slots[usuario_id] = slot
+            self._ids.append(usuario_id)
+            self._adjacencia.append({})
+            self._grau = _crescer(self._grau, slot + 1)
+            self._pai = _crescer(self._pai, slot + 1)
+            self._melhor_vizinho = _crescer(self._melhor_vizinho, slot + 1, -1)
+            self._melhor_volume = _crescer(self._melhor_volume, slot + 1)
+            self._pai[slot] = slot
+            self.quantidade_componentes += 1
+        return slot
+
+    def _slot_existente(self, usuario_id: UUID) -> int:
+        slot = self._slots.get(usuario_id)
+        if slot is None:
+            raise ValueError("Usuário não encontrado no grafo da comunidade")
+        return slot
+
+    def _raiz(self, slot: int) -> int:
+        while self._pai[slot] != slot:
+            # compressão de caminho pela metade
+            self._pai[slot] = self._pai[self._pai[slot]]
+            slot = int(self._pai[slot])
+        return slot
+
+    def _unir(self, a: int, b: int) -> None:
+        raiz_a, raiz_b = self._raiz(a), self._raiz(b)
+        if raiz_a != raiz_b:
+            self._pai[max(raiz_a, raiz_b)] = min(raiz_a, raiz_b)
+            self.quantidade_componentes -= 1
+
+    def registrar(self, remetente: UUID, destinatario: UUID, pontos: float) -> None:
+        """Registra uma transação entre dois usuários, atualizando a aresta e as estatísticas."""
+        a, b = self._slot(remetente), self._slot(destinatario)
+
+        aresta = self._adjacencia[a].get(b)
+        if aresta is None:
+            aresta = self._quantidade_arestas
+            self._quantidade_arestas += 1
+            self._adjacencia[a][b] = aresta
+            self._adjacencia[b][a] = aresta
+            self._origem = _crescer(self._origem, aresta + 1)
+            self._destino = _crescer(self._destino, aresta + 1)
+            self._contagem = _crescer(self._contagem, aresta + 1)
+            self._volume = _crescer(self._volume, aresta + 1)
+            self._origem[aresta], self._destino[aresta] = min(a, b), max(a, b)
+            self._grau[a] += 1
+            if a != b:
+                self._grau[b] += 1
+            self._unir(a, b)
+
+        self._contagem[aresta] += 1
+        self._volume[aresta] += pontos
+
+        # o volume de uma aresta só cresce, então o máximo pode ser mantido em O(1)
+        for no, vizinho in ((a, b), (b, a)):
+            if self._volume[aresta] > self._melhor_volume[no]:
+                self._melhor_volume[no] = self._volume[aresta]
+                self._melhor_vizinho[no] = vizinho
+
+        self.versao += 1
+
+    def vizinhos(self, usuario_id: UUID) -> Set[UUID]:
+        """Retorna os usuários que transacionaram com o usuário, em O(grau)."""
+        slot = self._slots.get(usuario_id)
+        if slot is None:
+            return set()
+        return {self._ids[vizinho] for vizinho in self._adjacencia[slot]}
+
+    def grau(self, usuario_id: UUID) -> int:
+        return int(self._grau[self._slot_existente(usuario_id)])
+
+    def melhor_vizinho(self, usuario_id: UUID) -> Optional[Tuple[UUID, float]]:
+        """Retorna o vizinho com maior volume trocado e o volume, em O(1)."""
+        slot = self._slot_existente(usuario_id)
+        vizinho = int(self._melhor_vizinho[slot])
+        if vizinho < 0:
+            return None
+        return self._ids[vizinho], float(self._melhor_volume[slot])
+
+    def vizinhos_principais(self, usuario_id: UUID, k: int = 5) -> List[Tuple[UUID, int, float]]:
+        """
+        Retorna os k vizinhos com maior volume, com a contagem e o volume de cada aresta.
+        Percorre apenas a adjacência do usuário, em O(grau log k).
+        """
+        slot = self._slot_existente(usuario_id)
+        principais = heapq.nlargest(
+            k, self._adjacencia[slot].items(), key=lambda item: self._volume[item[1]]
+        )
+        return [
+            (self._ids[vizinho], int(self._contagem[aresta]), float(self._volume[aresta]))
+            for vizinho, aresta in principais
+        ]
+
+    def mesmo_componente(self, a: UUID, b: UUID) -> bool:
+        return self._raiz(self._slot_existente(a)) == self._raiz(self._slot_existente(b))
+
+    def componentes(self) -> List[List[UUID]]:
+        """Retorna os usuários agrupados por componente conexo."""
+        grupos: Dict[int, List[UUID]] = {}
+        for slot, usuario_id in enumerate(self._ids):
+            grupos.setdefault(self._raiz(slot), []).append(usuario_id)
+        return list(grupos.values())
+
+    def para_csr(self) -> Tuple[List[UUID], np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Exporta o grafo no formato CSR simétrico.
+        Retorna os IDs de cada linha, `indptr`, `indices`, e as contagens e volumes das arestas.
+        """
+        n = len(self._ids)
+        m = self._quantidade_arestas
+        origem, destino = self._origem[:m], self._destino[:m]
+        laco = origem == destino
+
+        linhas = np.concatenate([origem, destino[~laco]])
+        colunas = np.concatenate([destino, origem[~laco]])
+        contagem = np.concatenate([self._contagem[:m], self._contagem[:m][~laco]])
+        volume = np.concatenate([self._volume[:m], self._volume[:m][~laco]])
+
+        ordem = np.lexsort((colunas, linhas))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(linhas, minlength=n), out=indptr[1:])
+        return list(self._ids), indptr, colunas[ordem], contagem[ordem], volume[ordem]
+
+    def visao(self) -> VisaoGrafo:
+        """Retorna a visão pronta para renderização, reconstruída apenas quando o grafo muda."""
+        if self._visao is None or self._visao.versao != self.versao:
+            n, m = len(self._ids), self._quantidade_arestas
+            self._visao = VisaoGrafo(
+                self.versao,
+                list(self._ids),
+                self._origem[:m].copy(),
+                self._destino[:m].copy(),
+                self._contagem[:m].copy(),
+                self._volume[:m].copy(),
+                self._grau[:n].copy(),
+            )
+        return self._visao
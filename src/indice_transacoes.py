@@ -0,0 +1,183 @@
+import math
+import sqlite3
+import hashlib
+import threading
+from src.transacao import Transacao
+from typing import Iterable, Iterator, List, Optional
+
+
+class FiltroBloom:
+    """
+    Filtro de Bloom com tamanho fixo, calculado a partir da capacidade
+    esperada e da taxa de falsos positivos desejada.
+    Nunca gera falsos negativos: se a chave foi adicionada, ela é encontrada.
+    """
+
+    def __init__(self, capacidade: int, taxa_falsos_positivos: float = 0.01) -> None:
+        if capacidade < 1:
+            raise ValueError("A capacidade do filtro deve ser positiva")
+        if not 0 < taxa_falsos_positivos < 1:
+            raise ValueError("A taxa de falsos positivos deve estar entre 0 e 1")
+
+        self.tamanho_bits = math.ceil(
+            -capacidade * math.log(taxa_falsos_positivos) / (math.log(2) ** 2)
+        )
+        self.quantidade_hashes = max(1, round(self.tamanho_bits / capacidade * math.log(2)))
+        self._bits = bytearray((self.tamanho_bits + 7) // 8)
+
+    def _posicoes(self, chave: bytes) -> Iterator[int]:
+        # hashing duplo: as k posições são derivadas de dois hashes independentes
+        digest = hashlib.sha256(chave).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        for i in range(self.quantidade_hashes):
+            yield (h1 + i * h2) % self.tamanho_bits
+
+    def adicionar(self, chave: bytes) -> None:
+        for posicao in self._posicoes(chave):
+            self._bits[posicao >> 3] |= 1 << (posicao & 7)
+
+    def __contains__(self, chave: bytes) -> bool:
+        return all(self._bits[posicao >> 3] & (1 << (posicao & 7)) for posicao in self._posicoes(chave))
+
+    def para_bytes(self) -> bytes:
+        return bytes(self._bits)
+
+    def carregar(self, bits: bytes) -> None:
+        """Substitui os bits do filtro pelos gravados com `para_bytes`, de um filtro de mesmo tamanho."""
+        if len(bits) != len(self._bits):
+            raise ValueError("O filtro gravado tem outro tamanho")
+        self._bits = bytearray(bits)
+
+
+class IndiceTransacoes:
+    """
+    Índice das transações já incluídas na cadeia, indexadas por ID e por hash.
+    Sem caminho, as chaves ficam em um conjunto em memória, consultado diretamente.
+    Com um caminho, ficam em um banco SQLite em disco e um filtro de Bloom de
+    tamanho fixo responde em memória a maioria das consultas negativas, de modo
+    que o uso de memória fica limitado mesmo com milhões de transações.
+    `altura` é a altura da cadeia até a qual as transações foram registradas; em
+    disco, ela é gravada no mesmo commit das chaves, para que ao reabrir a cadeia
+    só os blocos seguintes precisem ser indexados. `fechar` grava também os bits do
+    filtro, que são carregados ao abrir em vez de reler todas as chaves; a primeira
+    escrita seguinte os descarta, então uma interrupção só faz o filtro ser relido.
+    """
+
+    def __init__(self, capacidade: int = 1_000_000, taxa_falsos_positivos: float = 0.01,
+                 caminho: Optional[str] = None) -> None:
+        self._capacidade = capacidade
+        self._taxa_falsos_positivos = taxa_falsos_positivos
+        self._filtro: Optional[FiltroBloom] = None
+        self._trava = threading.Lock()
+        self.quantidade_chaves = 0
+        self.altura = 0
+        self.consultas = 0
+        self.consultas_em_disco = 0
+
+        self._memoria = set() if caminho is None else None
+        self._banco = None
+        self._filtro_gravado = False
+        if caminho is not None:
+            self._filtro = FiltroBloom(capacidade, taxa_falsos_positivos)
+            self._banco = sqlite3.connect(caminho, check_same_thread=False)
+            self._banco.execute(
+                "CREATE TABLE IF NOT EXISTS vistas (chave BLOB PRIMARY KEY) WITHOUT ROWID"
+            )
+            self._banco.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor INTEGER)")
+            self._banco.commit()
+            meta = dict(self._banco.execute("SELECT chave, valor FROM meta"))
+            self.altura = meta.get("altura", 0)
+            if "filtro" in meta and len(meta["filtro"]) == len(self._filtro.para_bytes()):
+                self._filtro.carregar(meta["filtro"])
+                self.quantidade_chaves = meta["chaves"]
+                self._filtro_gravado = True
+            else:
+                for (chave,) in self._banco.execute("SELECT chave FROM vistas"):
+                    self._filtro.adicionar(chave)
+                    self.quantidade_chaves += 1
+
+    @staticmethod
+    def _chaves(transacao: Transacao) -> List[bytes]:
+        chaves = [b"i" + transacao.id.bytes]
+        if transacao.hash is not None:
+            chaves.append(b"h" + transacao.hash)
+        return chaves
+
+    def _existe(self, chave: bytes) -> bool:
+        if self._memoria is not None:
+            return chave in self._memoria
+        if chave not in self._filtro:
+            return False
+        self.consultas_em_disco += 1
+        return self._banco.execute("SELECT 1 FROM vistas WHERE chave = ?", (chave,)).fetchone() is not None
+
+    def contem(self, transacao: Transacao) -> bool:
+        """Retorna True se uma transação com o mesmo ID ou o mesmo hash já foi registrada."""
+        with self._trava:
+            self.consultas += 1
+            for chave in self._chaves(transacao):
+                if self._existe(chave):
+                    return True
+            return False
+
+    def adicionar(self, transacao: Transacao, altura: Optional[int] = None) -> None:
+        """Registra a transação como incluída na cadeia, que passa a ter `altura` blocos, se informada."""
+        self.adicionar_lote([transacao], altura)
+
+    def adicionar_lote(self, transacoes: Iterable[Transacao], altura: Optional[int] = None) -> None:
+        """
+        Registra várias transações de uma vez, com uma única escrita em disco.
+        Com `altura`, registra também a altura da cadeia coberta pelo índice.
+        """
+        with self._trava:
+            chaves = [chave for transacao in transacoes for chave in self._chaves(transacao)]
+            if altura is not None:
+                self.altura = altura
+            if self._memoria is not None:
+                antes = len(self._memoria)
+                self._memoria.update(chaves)
+                self.quantidade_chaves += len(self._memoria) - antes
+                return
+
+            for chave in chaves:
+                self._filtro.adicionar(chave)
+            # chaves já presentes (por exemplo, ao reconstruir o índice) não são contadas de novo
+            cursor = self._banco.executemany(
+                "INSERT OR IGNORE INTO vistas (chave) VALUES (?)", [(chave,) for chave in chaves]
+            )
+            self.quantidade_chaves += cursor.rowcount
+            if altura is not None:
+                self._banco.execute("INSERT OR REPLACE INTO meta (chave, valor) VALUES ('altura', ?)", (altura,))
+            if self._filtro_gravado:
+                # o filtro gravado deixou de cobrir todas as chaves
+                self._banco.execute("DELETE FROM meta WHERE chave IN ('filtro', 'chaves')")
+                self._filtro_gravado = False
+            self._banco.commit()
+
+    def limpar(self) -> None:
+        """Remove todas as transações registradas, por exemplo quando a cadeia encolheu."""
+        with self._trava:
+            self.quantidade_chaves = 0
+            self.altura = 0
+            if self._memoria is not None:
+                self._memoria.clear()
+                return
+            # o filtro de Bloom não permite remoções, então é recriado vazio
+            self._filtro = FiltroBloom(self._capacidade, self._taxa_falsos_positivos)
+            self._banco.execute("DELETE FROM vistas")
+            self._banco.execute("DELETE FROM meta")
+            self._banco.commit()
+            self._filtro_gravado = False
+
+    def fechar(self) -> None:
+        """Grava os bits do filtro e a quantidade de chaves, para a próxima abertura, e fecha o banco."""
+        if self._banco is None:
+            return
+        with self._trava:
+            self._banco.executemany(
+                "INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)",
+                [("filtro", self._filtro.para_bytes()), ("chaves", self.quantidade_chaves)],
+            )
+            self._banco.commit()
+            self._banco.close()
@@ -0,0 +1,192 @@
+import math
+import numpy as np
+from uuid import UUID
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Os saldos são guardados em ponto fixo: 1 ponto = ESCALA unidades inteiras
+ESCALA = 1_000_000
+
+
+def para_fixo(pontos: float) -> int:
+    """Converte um valor em pontos para unidades inteiras de ponto fixo."""
+    return int(round(pontos * ESCALA))
+
+
+def valor_valido(pontos: float) -> bool:
+    """
+    Retorna True se o valor pode ser transferido pelo livro: um número finito
+    que continua positivo depois de arredondado para ponto fixo.
+    Valores abaixo de 1 / ESCALA são arredondados para zero e rejeitados.
+    """
+    try:
+        return math.isfinite(pontos) and para_fixo(pontos) > 0
+    except TypeError:
+        return False
+
+
+class LivroSaldos:
+    """
+    Livro-razão dos saldos, guardados como inteiros de ponto fixo em um array NumPy.
+    Cada usuário ocupa uma posição (slot) densa do array, o que permite validar
+    e aplicar lotes de transferências de forma vetorizada.
+    Além do total, mantém o total dos usuários marcados como ativos.
+    """
+
+    def __init__(self, capacidade: int = 64) -> None:
+        self._saldos = np.zeros(capacidade, dtype=np.int64)
+        self._ativos = np.zeros(capacidade, dtype=bool)
+        self._slots: Dict[UUID, int] = {}
+        self._ids: List[UUID] = []
+        self._total = 0
+        self._total_ativo = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, usuario_id: UUID) -> bool:
+        return usuario_id in self._slots
+
+    def slot(self, usuario_id: UUID) -> int:
+        """Retorna o slot do usuário no array de saldos."""
+        slot = self._slots.get(usuario_id)
+        if slot is None:
+            raise ValueError("Usuário não encontrado no livro de saldos")
+        return slot
+
+    def registrar(self, usuario_id: UUID, pontos: float = 0.0) -> int:
+        """
+        Reserva um slot para o usuário com o saldo informado.
+        Se o usuário já estiver registrado, retorna o slot existente.
+        """
+        if usuario_id in self._slots:
+            return self._slots[usuario_id]
+
+        slot = len(self._ids)
+        if slot == len(self._saldos):
+            self._saldos = np.concatenate([self._saldos, np.zeros(len(self._saldos), dtype=np.int64)])
+            self._ativos = np.concatenate([self._ativos, np.zeros(len(self._ativos), dtype=bool)])
+
+        self._slots[usuario_id] = slot
+        self._ids.append(usuario_id)
+        valor = para_fixo(pontos)
+        self._saldos[slot] = valor
+        self._total += valor
+        return slot
+
+    def definir(self, usuario_id: UUID, pontos: float) -> None:
+        """Define o saldo de um usuário, registrando-o se necessário."""
+        if usuario_id not in self._slots:
+            self.registrar(usuario_id, pontos)
+            return
+        slot = self._slots[usuario_id]
+        valor = para_fixo(pontos)
+        diferenca = valor - int(self._saldos[slot])
+        self._total += diferenca
+        if self._ativos[slot]:
+            self._total_ativo += diferenca
+        self._saldos[slot] = valor
+
+    def definir_ativo(self, usuario_id: UUID, ativo: bool) -> None:
+        """Marca o usuário como ativo ou inativo, atualizando o total ativo em O(1)."""
+        slot = self.slot(usuario_id)
+        if bool(self._ativos[slot]) == ativo:
+            return
+        self._ativos[slot] = ativo
+        saldo = int(self._saldos[slot])
+        self._total_ativo += saldo if ativo else -saldo
+
+    def saldo(self, usuario_id: UUID) -> float:
+        return int(self._saldos[self.slot(usuario_id)]) / ESCALA
+
+    def possui(self, usuario_id: UUID, pontos: float) -> bool:
+        """Retorna True se o usuário tiver saldo suficiente para o valor informado."""
+        return int(self._saldos[self.slot(usuario_id)]) >= para_fixo(pontos)
+
+    def transferir(self, remetente: UUID, destinatario: UUID, pontos: float) -> None:
+        """Transfere pontos entre dois usuários, validando o saldo do remetente."""
+        self.aplicar_lote([remetente], [destinatario], [pontos])
+
+    def aplicar_lote(self, remetentes: Sequence[UUID], destinatarios: Sequence[UUID],
+                     valores: Sequence[float]) -> None:
+        """
+        Aplica um lote de transferências de uma só vez.
+        Cada remetente precisa ter saldo para cobrir todas as suas saídas no lote,
+        sem contar entradas do próprio lote. Se alguma validação falhar,
+        nenhum saldo é alterado.
+        """
+        if not (len(remetentes) == len(destinatarios) == len(valores)):
+            raise ValueError("Remetentes, destinatários e valores devem ter o mesmo tamanho")
+        if len(valores) == 0:
+            return
+
+        origem = np.fromiter((self.slot(u) for u in remetentes), dtype=np.int64, count=len(remetentes))
+        destino = np.fromiter((self.slot(u) for u in destinatarios), dtype=np.int64, count=len(destinatarios))
+        quantias = np.rint(np.asarray(valores, dtype=np.float64) * ESCALA).astype(np.int64)
+
+        if (quantias <= 0).any():
+            raise ValueError("Valores de transferência devem ser positivos")
+
+        n = len(self._ids)
+        debitos = np.zeros(n, dtype=np.int64)
+        creditos = np.zeros(n, dtype=np.int64)
+        np.add.at(debitos, origem, quantias)
+        np.add.at(creditos, destino, quantias)
+
+        saldos = self._saldos[:n]
+        insuficientes = np.flatnonzero(saldos < debitos)
+        if len(insuficientes):
+            raise ValueError(f"Saldo insuficiente para {len(insuficientes)} remetente(s) do lote")
+
+        if debitos.sum() != creditos.sum():
+            raise ValueError("Lote não conserva o total de pontos")
+
+        variacoes = creditos - debitos
+        saldos += variacoes
+        self._total_ativo += int(variacoes[self._ativos[:n]].sum())
+
+    def aplicar_variacoes(self, variacoes: Dict[UUID, int]) -> None:
+        """
+        Aplica de uma só vez variações líquidas de saldo, em unidades de ponto fixo,
+        como as acumuladas ao simular um lote de transferências em ordem.
+        As variações devem somar zero e nenhum saldo pode ficar negativo;
+        se alguma validação falhar, nenhum saldo é alterado.
+        """
+        if not variacoes:
+            return
+        slots = np.fromiter((self.slot(u) for u in variacoes), dtype=np.int64, count=len(variacoes))
+        valores = np.fromiter(variacoes.values(), dtype=np.int64, count=len(variacoes))
+        if valores.sum() != 0:
+            raise ValueError("Variações não conservam o total de pontos")
+        if (self._saldos[slots] + valores < 0).any():
+            raise ValueError("Variações deixariam saldo negativo")
+
+        self._saldos[slots] += valores
+        self._total_ativo += int(valores[self._ativos[slots]].sum())
+
+    def total(self) -> float:
+        """Retorna o total de pontos em circulação, em O(1)."""
+        return self._total / ESCALA
+
+    def total_ativo(self) -> float:
+        """Retorna o total de pontos dos usuários ativos, em O(1)."""
+        return self._total_ativo / ESCALA
+
+    def soma(self, usuarios: Iterable[UUID]) -> float:
+        """Retorna a soma dos saldos dos usuários informados."""
+        slots = np.fromiter((self.slot(u) for u in usuarios), dtype=np.int64)
+        return int(self._saldos[slots].sum()) / ESCALA
+
+    def maiores(self, k: int) -> List[Tuple[UUID, float]]:
+        """Retorna os k maiores saldos, em ordem decrescente."""
+        n = len(self._ids)
+        k = min(k, n)
+        if k <= 0:
+            return []
+        saldos = self._saldos[:n]
+        candidatos = np.argpartition(saldos, n - k)[n - k:]
+        ordenados = candidatos[np.argsort(saldos[candidatos])[::-1]]
+        return [(self._ids[i], int(saldos[i]) / ESCALA) for i in ordenados]
+
+    def histograma(self, faixas: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """Retorna as contagens e os limites das faixas de saldo, como `np.histogram`."""
+        return np.histogram(self._saldos[:len(self._ids)] / ESCALA, bins=faixas)
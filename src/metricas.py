@@ -0,0 +1,95 @@
+from collections import deque
+from typing import Deque, NamedTuple, Tuple
+from src.livro_saldos import ESCALA, LivroSaldos, para_fixo
+
+
+class ResumoMetricas(NamedTuple):
+    """Fotografia imutável das métricas agregadas da rede."""
+    usuarios_ativos: int
+    usuarios_banidos: int
+    pontos_totais: float
+    pontos_ativos: float
+    transacoes: int
+    volume: float
+    propostas: int
+    propostas_aceitas: int
+    taxa_aceitacao: float
+    latencia_media: float
+    latencia_ultima: float
+
+
+class MetricasRede:
+    """
+    Agregados da rede mantidos incrementalmente pela blockchain.
+    Cada evento (registro, banimento, consenso, efetivação) atualiza os contadores
+    em O(1), e a latência dos blocos é uma média móvel sobre os últimos
+    `janela_latencia` blocos, mantida com uma fila e uma soma corrente.
+    Os totais de pontos são lidos do livro de saldos, que também os mantém em O(1).
+    """
+
+    def __init__(self, livro: LivroSaldos, janela_latencia: int = 100) -> None:
+        if janela_latencia < 1:
+            raise ValueError("A janela de latência deve ser positiva")
+        self.livro = livro
+        self.usuarios_ativos = 0
+        self.usuarios_banidos = 0
+        self.transacoes = 0
+        self.propostas = 0
+        self.propostas_aceitas = 0
+        self._volume = 0
+        self._latencias: Deque[float] = deque(maxlen=janela_latencia)
+        self._soma_latencias = 0.0
+
+    def usuario_registrado(self) -> None:
+        self.usuarios_ativos += 1
+
+    def usuario_banido(self) -> None:
+        self.usuarios_ativos -= 1
+        self.usuarios_banidos += 1
+
+    def usuario_desbanido(self) -> None:
+        self.usuarios_banidos -= 1
+        self.usuarios_ativos += 1
+
+    def consenso(self, aceito: bool) -> None:
+        """Registra o resultado de uma rodada de consenso."""
+        self.propostas += 1
+        if aceito:
+            self.propostas_aceitas += 1
+
+    def transacao_efetivada(self, pontos: float) -> None:
+        self.transacoes += 1
+        self._volume += para_fixo(pontos)
+
+    def transacoes_efetivadas(self) -> Tuple[int, int]:
+        """Retorna a quantidade e o volume (em ponto fixo) das transações efetivadas."""
+        return self.transacoes, self._volume
+
+    def retomar_transacoes(self, transacoes: int, volume: int) -> None:
+        """Retoma os totais de transações gravados ao fechar a cadeia, antes de reproduzir o restante."""
+        self.transacoes = transacoes
+        self._volume = volume
+
+    def latencia_bloco(self, segundos: float) -> None:
+        """Registra a latência de um bloco, da proposta à efetivação."""
+        if len(self._latencias) == self._latencias.maxlen:
+            self._soma_latencias -= self._latencias[0]
+        self._latencias.append(segundos)
+        self._soma_latencias += segundos
+
+    def resumo(self) -> ResumoMetricas:
+        """Retorna uma fotografia das métricas, sem percorrer usuários ou blocos."""
+        quantidade = len(self._latencias)
+        return ResumoMetricas(
+            usuarios_ativos=self.usuarios_ativos,
+            usuarios_banidos=self.usuarios_banidos,
+            pontos_totais=self.livro.total(),
+            pontos_ativos=self.livro.total_ativo(),
+            transacoes=self.transacoes,
+            volume=self._volume / ESCALA,
+            propostas=self.propostas,
+            propostas_aceitas=self.propostas_aceitas,
+            taxa_aceitacao=self.propostas_aceitas / self.propostas if self.propostas else 0.0,
+            latencia_media=self._soma_latencias / quantidade if quantidade else 0.0,
+            latencia_ultima=self._latencias[-1] if quantidade else 0.0,
+        )
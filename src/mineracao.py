@@ -0,0 +1,197 @@
+import time
+import queue
+import hashlib
+import threading
+import multiprocessing
+from typing import List, Optional, Tuple
+from multiprocessing.process import BaseProcess
+
+# quantidade de nonces testados entre verificações do sinal de cancelamento
+_LOTE = 4096
+# segundos de espera por resultados antes de conferir se os processos continuam vivos
+_INTERVALO_VERIFICACAO = 0.5
+# até esta dificuldade a busca é feita no próprio processo, pois termina em poucos
+# milissegundos, menos do que a troca de mensagens com os processos de mineração
+DIFICULDADE_EM_PROCESSO = 10
+
+
+def atende_dificuldade(hash_bloco: bytes, dificuldade: int) -> bool:
+    """Retorna True se o hash tiver pelo menos `dificuldade` bits iniciais zerados."""
+    return int.from_bytes(hash_bloco, "big") >> (8 * len(hash_bloco) - dificuldade) == 0
+
+
+def _procurar(cabecalho: bytes, dificuldade: int, inicio: int, passo: int,
+              encontrado) -> Tuple[Optional[int], int, float]:
+    """
+    Testa os nonces inicio, inicio + passo, inicio + 2 * passo, ...
+    até encontrar um hash válido ou até outro processo sinalizar que encontrou.
+    Retorna o nonce (ou None, se cancelado), as tentativas e os segundos gastos.
+    """
+    base = hashlib.sha256(cabecalho)
+    limite = 1 << (256 - dificuldade)
+    nonce = inicio
+    tentativas = 0
+    comeco = time.perf_counter()
+
+    while not encontrado.is_set():
+        for _ in range(_LOTE):
+            digest = base.copy()
+            digest.update(nonce.to_bytes(8, "big"))
+            tentativas += 1
+            if int.from_bytes(digest.digest(), "big") < limite:
+                encontrado.set()
+                return nonce, tentativas, time.perf_counter() - comeco
+            nonce += passo
+
+    return None, tentativas, time.perf_counter() - comeco
+
+
+def _trabalhador(tarefas, encontrado, resultados) -> None:
+    """
+    Processo de mineração de longa duração: executa cada busca recebida em
+    `tarefas` e envia o resultado em `resultados`, até receber None.
+    """
+    while True:
+        tarefa = tarefas.get()
+        if tarefa is None:
+            return
+        resultados.put(_procurar(*tarefa, encontrado))
+
+
+class ResultadoMineracao:
+    """
+    Classe que representa o resultado de uma busca de nonce,
+    com as tentativas e o tempo de cada processo.
+    """
+    def __init__(self, nonce: int, tentativas: List[int], segundos: List[float]) -> None:
+        self.nonce = nonce
+        self.tentativas = tentativas
+        self.segundos = segundos
+
+    @property
+    def taxa_por_nucleo(self) -> List[float]:
+        """Hashes por segundo de cada processo."""
+        return [t / s if s > 0 else 0.0 for t, s in zip(self.tentativas, self.segundos)]
+
+    @property
+    def taxa_total(self) -> float:
+        return sum(self.taxa_por_nucleo)
+
+
+def _coletar(trabalhadores: List[BaseProcess], resultados) -> List[Tuple[Optional[int], int, float]]:
+    """
+    Aguarda um resultado de cada processo, conferindo periodicamente se algum
+    terminou, o que só acontece se ele tiver sido morto ou falhado no meio da busca.
+    """
+    respostas = []
+    while len(respostas) < len(trabalhadores):
+        try:
+            respostas.append(resultados.get(timeout=_INTERVALO_VERIFICACAO))
+            continue
+        except queue.Empty:
+            pass
+        falhos = [t.exitcode for t in trabalhadores if t.exitcode is not None]
+        if falhos:
+            raise RuntimeError(f"Processo de mineração terminou com código {falhos[0]}")
+    return respostas
+
+
+class PoolMineracao:
+    """
+    Processos de mineração mantidos entre os blocos, para que cada busca não
+    pague a criação de novos processos (centenas de milissegundos com spawn).
+    Os processos são criados na primeira busca acima de `DIFICULDADE_EM_PROCESSO`;
+    cada um recebe as suas tarefas por uma fila própria e todos compartilham o
+    sinal de cancelamento, limpo entre as buscas. As buscas são serializadas.
+    Se um processo morrer no meio de uma busca, ela é cancelada com RuntimeError
+    e os processos são recriados na próxima.
+    """
+
+    def __init__(self, processos: Optional[int] = None) -> None:
+        self.processos = processos or multiprocessing.cpu_count()
+        self._contexto = multiprocessing.get_context("spawn")
+        self._trava = threading.Lock()
+        self._trabalhadores: List[BaseProcess] = []
+        self._tarefas = []
+        self._encontrado = None
+        self._resultados = None
+
+    def __enter__(self) -> "PoolMineracao":
+        return self
+
+    def __exit__(self, *excecao) -> None:
+        self.fechar()
+
+    def _iniciar(self) -> None:
+        self._encontrado = self._contexto.Event()
+        self._resultados = self._contexto.Queue()
+        self._tarefas = [self._contexto.Queue() for _ in range(self.processos)]
+        self._trabalhadores = [
+            self._contexto.Process(
+                target=_trabalhador,
+                args=(tarefas, self._encontrado, self._resultados),
+                daemon=True,
+            )
+            for tarefas in self._tarefas
+        ]
+        for trabalhador in self._trabalhadores:
+            trabalhador.start()
+
+    def _encerrar(self, forcar: bool = False) -> None:
+        for trabalhador, tarefas in zip(self._trabalhadores, self._tarefas):
+            if forcar:
+                trabalhador.terminate()
+            elif trabalhador.is_alive():
+                tarefas.put(None)
+        for trabalhador in self._trabalhadores:
+            trabalhador.join()
+        self._trabalhadores = []
+        self._tarefas = []
+
+    def buscar(self, cabecalho: bytes, dificuldade: int) -> ResultadoMineracao:
+        """
+        Procura um nonce tal que sha256(cabecalho + nonce) tenha `dificuldade` bits
+        iniciais zerados, dividindo o espaço de nonces entre os processos.
+        Assim que um processo encontra um nonce válido, os demais são cancelados.
+        """
+        if not 0 < dificuldade <= 255:
+            raise ValueError("A dificuldade deve estar entre 1 e 255 bits")
+
+        if dificuldade <= DIFICULDADE_EM_PROCESSO:
+            nonce, tentativas, segundos = _procurar(cabecalho, dificuldade, 0, 1, threading.Event())
+            return ResultadoMineracao(nonce, [tentativas], [segundos])
+
+        with self._trava:
+            if not self._trabalhadores:
+                self._iniciar()
+            for i, tarefas in enumerate(self._tarefas):
+                tarefas.put((cabecalho, dificuldade, i, self.processos))
+            try:
+                respostas = _coletar(self._trabalhadores, self._resultados)
+            except RuntimeError:
+                self._encontrado.set()
+                self._encerrar(forcar=True)
+                raise
+            # todos os processos já responderam, então o sinal pode ser reutilizado
+            self._encontrado.clear()
+
+        vencedores = [nonce for nonce, _, _ in respostas if nonce is not None]
+        return ResultadoMineracao(
+            nonce=min(vencedores),
+            tentativas=[tentativas for _, tentativas, _ in respostas],
+            segundos=[segundos for _, _, segundos in respostas],
+        )
+
+    def fechar(self) -> None:
+        """Encerra os processos de mineração, se tiverem sido criados."""
+        with self._trava:
+            self._encerrar()
+
+
+def buscar_nonce(cabecalho: bytes, dificuldade: int, processos: Optional[int] = None) -> ResultadoMineracao:
+    """
+    Busca avulsa de nonce, com processos criados e encerrados só para ela.
+    Para minerar vários blocos, use um `PoolMineracao`, como a blockchain faz.
+    """
+    with PoolMineracao(processos) as pool:
+        return pool.buscar(cabecalho, dificuldade)
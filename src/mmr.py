@@ -0,0 +1,250 @@
+import os
+import hashlib
+import threading
+from typing import List, Optional, Tuple
+
+TAMANHO_NO = 32
+
+
+def hash_folha(dado: bytes) -> bytes:
+    return hashlib.sha256(b"\x00" + dado).digest()
+
+
+def hash_no(esquerda: bytes, direita: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + esquerda + direita).digest()
+
+
+def ensacar_picos(picos: List[bytes], tamanho: int) -> bytes:
+    """
+    Combina os picos das montanhas, da direita para a esquerda,
+    em uma única raiz que também compromete a quantidade de folhas.
+    """
+    acumulado = b""
+    for pico in reversed(picos):
+        acumulado = pico if not acumulado else hash_no(pico, acumulado)
+    return hashlib.sha256(tamanho.to_bytes(8, "big") + acumulado).digest()
+
+
+class ProvaInclusao:
+    """
+    Classe que representa a prova de inclusão de uma folha no MMR.
+    O caminho guarda, para cada nível, o hash irmão e se ele está à esquerda.
+    """
+    def __init__(self, indice: int, tamanho: int, caminho: List[Tuple[bool, bytes]],
+                 picos: List[bytes], indice_pico: int) -> None:
+        self.indice = indice
+        self.tamanho = tamanho
+        self.caminho = caminho
+        self.picos = picos
+        self.indice_pico = indice_pico
+
+
+def localizar_folha(indice: int, tamanho: int) -> Tuple[int, int, int]:
+    """
+    Localiza a folha em um MMR com `tamanho` folhas, a partir apenas dos dois números.
+    As montanhas correspondem aos bits de `tamanho`, da maior para a menor.
+    Retorna o índice do pico, a altura da montanha e a posição da folha dentro dela.
+    """
+    if not 0 <= indice < tamanho:
+        raise ValueError(f"Altura {indice} fora do acumulador")
+    inicio = 0
+    indice_pico = 0
+    for altura in range(tamanho.bit_length() - 1, -1, -1):
+        if not tamanho >> altura & 1:
+            continue
+        if indice < inicio + (1 << altura):
+            return indice_pico, altura, indice - inicio
+        inicio += 1 << altura
+        indice_pico += 1
+    raise ValueError(f"Altura {indice} fora do acumulador")
+
+
+def verificar_prova(raiz: bytes, dado: bytes, prova: ProvaInclusao) -> bool:
+    """
+    Verifica se o dado (hash do bloco) está incluído no MMR com a raiz informada,
+    na altura `prova.indice`. As direções do caminho e o pico são derivados de
+    (indice, tamanho), e não dos campos da prova, para que a prova fixe a altura.
+    """
+    try:
+        indice_pico, altura, deslocamento = localizar_folha(prova.indice, prova.tamanho)
+    except ValueError:
+        return False
+    if len(prova.picos) != bin(prova.tamanho).count("1") or len(prova.caminho) != altura:
+        return False
+
+    atual = hash_folha(dado)
+    for nivel, (_, irmao) in enumerate(prova.caminho):
+        if deslocamento >> nivel & 1:
+            atual = hash_no(irmao, atual)
+        else:
+            atual = hash_no(atual, irmao)
+
+    if atual != prova.picos[indice_pico]:
+        return False
+    return ensacar_picos(prova.picos, prova.tamanho) == raiz
+
+
+def _nos_antes(folhas: int) -> int:
+    """Quantidade de nós em pós-ordem de um MMR com `folhas` folhas, que é a posição da próxima folha."""
+    return 2 * folhas - bin(folhas).count("1")
+
+
+class ResumoMMR:
+    """
+    Versão reduzida do MMR que guarda apenas os picos.
+    Calcula as mesmas raízes com memória O(log n), mas não gera provas.
+    """
+    def __init__(self, picos: Optional[List[Tuple[bytes, int]]] = None, tamanho: int = 0) -> None:
+        self._picos: List[Tuple[bytes, int]] = list(picos or [])
+        self._tamanho = tamanho
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    def adicionar(self, dado: bytes) -> None:
+        self._picos.append((hash_folha(dado), 0))
+        self._tamanho += 1
+        while len(self._picos) >= 2 and self._picos[-1][1] == self._picos[-2][1]:
+            direita, altura = self._picos.pop()
+            esquerda, _ = self._picos.pop()
+            self._picos.append((hash_no(esquerda, direita), altura + 1))
+
+    def raiz(self) -> bytes:
+        return ensacar_picos([pico for pico, _ in self._picos], self._tamanho)
+
+
+class MerkleMountainRange:
+    """
+    Acumulador append-only sobre os hashes dos blocos.
+    Os nós são guardados em pós-ordem, e cada inserção une as montanhas
+    de mesma altura, mantendo no máximo log(n) picos. As posições dos nós são
+    calculadas a partir do índice da folha, então só os picos ficam em memória
+    junto com os nós. Com um caminho, os nós são gravados em um arquivo de
+    registros de 32 bytes e lidos sob demanda para montar as provas; ao abrir um
+    arquivo existente, a quantidade de folhas é derivada da quantidade de nós e
+    os picos são lidos das suas posições, sem recalcular hashes.
+    """
+    def __init__(self, caminho: Optional[str] = None) -> None:
+        self.caminho = caminho
+        self._tamanho = 0
+        self._quantidade_nos = 0
+        self._picos: List[Tuple[bytes, int]] = []
+        self._nos: Optional[List[bytes]] = [] if caminho is None else None
+        self._arquivo = None
+        self._trava = threading.Lock()
+        if caminho is not None:
+            self._arquivo = open(caminho, "r+b" if os.path.exists(caminho) else "w+b")
+            quantidade_nos = self._arquivo.seek(0, os.SEEK_END) // TAMANHO_NO
+            # um registro incompleto no fim (escrita interrompida) é descartado
+            folhas = (quantidade_nos + 64) // 2
+            while folhas > 0 and _nos_antes(folhas) > quantidade_nos:
+                folhas -= 1
+            self._tamanho = folhas
+            self.truncar(folhas)
+
+    def __len__(self) -> int:
+        return self._tamanho
+
+    def adicionar(self, dado: bytes) -> int:
+        """
+        Adiciona uma folha ao acumulador.
+        Retorna o índice da folha, que coincide com a altura do bloco na cadeia.
+        """
+        novos = [hash_folha(dado)]
+        self._picos.append((novos[0], 0))
+        while len(self._picos) >= 2 and self._picos[-1][1] == self._picos[-2][1]:
+            direita, altura = self._picos.pop()
+            esquerda, _ = self._picos.pop()
+            novos.append(hash_no(esquerda, direita))
+            self._picos.append((novos[-1], altura + 1))
+
+        with self._trava:
+            if self._nos is not None:
+                self._nos.extend(novos)
+            else:
+                self._arquivo.seek(self._quantidade_nos * TAMANHO_NO)
+                self._arquivo.write(b"".join(novos))
+                self._arquivo.flush()
+            self._quantidade_nos += len(novos)
+        self._tamanho += 1
+        return self._tamanho - 1
+
+    def _no(self, posicao: int) -> bytes:
+        if self._nos is not None:
+            return self._nos[posicao]
+        self._arquivo.seek(posicao * TAMANHO_NO)
+        return self._arquivo.read(TAMANHO_NO)
+
+    def folha(self, indice: int) -> bytes:
+        """Retorna o hash da folha no índice informado, como gravado no acumulador."""
+        if not 0 <= indice < self._tamanho:
+            raise ValueError(f"Altura {indice} fora do acumulador")
+        with self._trava:
+            return self._no(_nos_antes(indice))
+
+    def truncar(self, folhas: int) -> None:
+        """
+        Descarta as folhas a partir do índice `folhas` e os nós que dependem delas.
+        Os picos do prefixo são lidos das suas posições em pós-ordem.
+        """
+        if not 0 <= folhas <= self._tamanho:
+            raise ValueError(f"O acumulador tem apenas {self._tamanho} folhas")
+        with self._trava:
+            self._quantidade_nos = _nos_antes(folhas)
+            if self._nos is not None:
+                del self._nos[self._quantidade_nos:]
+            else:
+                self._arquivo.truncate(self._quantidade_nos * TAMANHO_NO)
+
+            picos = []
+            inicio = 0
+            for altura in range(folhas.bit_length() - 1, -1, -1):
+                if folhas >> altura & 1:
+                    # o pico é o último nó da montanha, que ocupa 2^(h+1) - 1 nós
+                    picos.append((self._no(_nos_antes(inicio) + (2 << altura) - 2), altura))
+                    inicio += 1 << altura
+            self._picos = picos
+            self._tamanho = folhas
+
+    def fechar(self) -> None:
+        if self._arquivo is not None:
+            self._arquivo.close()
+
+    def resumo(self) -> ResumoMMR:
+        """Retorna uma cópia reduzida, apenas com os picos, para simular inserções."""
+        return ResumoMMR(self._picos, self._tamanho)
+
+    def raiz(self) -> bytes:
+        """Retorna a raiz compacta que compromete todas as folhas atuais."""
+        return ensacar_picos([pico for pico, _ in self._picos], self._tamanho)
+
+    def prova(self, indice: int) -> ProvaInclusao:
+        """
+        Gera a prova de inclusão, em O(log n), da folha no índice informado.
+        """
+        indice_pico, altura, deslocamento = localizar_folha(indice, self._tamanho)
+
+        # a montanha começa depois das folhas das montanhas maiores, à esquerda
+        inicio = indice - deslocamento
+        base = _nos_antes(inicio)
+        caminho = []
+        with self._trava:
+            # desce da raiz da montanha até a folha; cada subárvore ocupa 2^(h+1) - 1 nós
+            for nivel in range(altura, 0, -1):
+                metade = (1 << nivel) - 1
+                raiz_esquerda = base + metade - 1
+                raiz_direita = base + 2 * metade - 1
+                if deslocamento >> (nivel - 1) & 1:
+                    caminho.append((True, self._no(raiz_esquerda)))
+                    base += metade
+                else:
+                    caminho.append((False, self._no(raiz_direita)))
+
+        caminho.reverse()
+        return ProvaInclusao(
+            indice=indice,
+            tamanho=self._tamanho,
+            caminho=caminho,
+            picos=[pico for pico, _ in self._picos],
+            indice_pico=indice_pico,
+        )
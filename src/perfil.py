@@ -0,0 +1,201 @@
+import os
+import pstats
+import cProfile
+import functools
+import threading
+import tracemalloc
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+METODOS_PERFILAVEIS = ("adicionar_bloco", "verificar")
+
+# caminhos com participação menor que esta (em segundos) não são expandidos na pilha colapsada
+_TEMPO_MINIMO_PILHA = 1e-6
+_PROFUNDIDADE_MAXIMA = 128
+
+_Funcao = Tuple[str, int, str]
+
+
+def _rotulo(funcao: _Funcao) -> str:
+    arquivo, linha, nome = funcao
+    if arquivo == "~":
+        # funções nativas, como {method 'sign' of ...}
+        return nome
+    return f"{nome} ({os.path.basename(arquivo)}:{linha})"
+
+
+def pilhas_colapsadas(estatisticas: pstats.Stats) -> Dict[str, float]:
+    """
+    Reconstrói pilhas no formato colapsado (`a;b;c`) a partir do grafo de chamadas do cProfile,
+    com o tempo próprio de cada função em segundos. O cProfile só registra pares
+    chamador/chamado, então o tempo de uma função chamada por vários caminhos é dividido
+    entre eles na proporção do tempo acumulado de cada aresta.
+    """
+    dados = estatisticas.stats
+    chamados: Dict[_Funcao, List[Tuple[_Funcao, float]]] = defaultdict(list)
+    raizes = []
+    for funcao, (_, _, _, _, chamadores) in dados.items():
+        if not chamadores:
+            raizes.append(funcao)
+        for chamador, (_, _, _, acumulado) in chamadores.items():
+            chamados[chamador].append((funcao, acumulado))
+
+    pilhas: Dict[str, float] = defaultdict(float)
+
+    def visitar(funcao: _Funcao, caminho: List[str], no_caminho: set, fracao: float) -> None:
+        _, _, proprio, acumulado, _ = dados[funcao]
+        caminho.append(_rotulo(funcao))
+        no_caminho.add(funcao)
+        if proprio * fracao > 0:
+            pilhas[";".join(caminho)] += proprio * fracao
+
+        if len(caminho) < _PROFUNDIDADE_MAXIMA:
+            for filho, acumulado_aresta in chamados[funcao]:
+                total_filho = dados[filho][3]
+                if filho in no_caminho or total_filho <= 0:
+                    continue
+                fracao_filho = fracao * (acumulado_aresta / total_filho)
+                if fracao_filho * total_filho >= _TEMPO_MINIMO_PILHA:
+                    visitar(filho, caminho, no_caminho, fracao_filho)
+
+        no_caminho.discard(funcao)
+        caminho.pop()
+
+    for raiz in raizes:
+        visitar(raiz, [], set(), 1.0)
+    return pilhas
+
+
+class CapturaPerfil:
+    """
+    Captura de perfil das próximas `chamadas` chamadas aos métodos informados de um objeto.
+    Enquanto ativa, os métodos são sobrescritos por atributos da instância que executam
+    cada chamada sob cProfile e tracemalloc; ao fim das chamadas os atributos são removidos
+    e os métodos da classe voltam a ser usados diretamente, sem custo algum.
+    Para cada chamada capturada são gravados no diretório:
+    - `<metodo>-<n>.prof`: estatísticas do cProfile, para pstats ou snakeviz;
+    - `<metodo>-<n>.folded`: pilhas colapsadas em microssegundos, para flamegraph.pl ou speedscope;
+    - `<metodo>-<n>-alocacoes.txt`: principais locais de alocação de memória.
+    O cProfile mede apenas a thread que fez a chamada; trabalho em pools de threads
+    aparece como espera na thread chamadora.
+    """
+
+    def __init__(self, alvo: object, diretorio: str, chamadas: int = 1,
+                 metodos: Sequence[str] = METODOS_PERFILAVEIS, locais_alocacao: int = 25,
+                 quadros_alocacao: int = 16) -> None:
+        if chamadas < 1:
+            raise ValueError("A quantidade de chamadas deve ser positiva")
+        for nome in metodos:
+            if nome in vars(alvo):
+                raise ValueError(f"Já existe uma captura de perfil ativa para {nome}")
+
+        os.makedirs(diretorio, exist_ok=True)
+        self.alvo = alvo
+        self.diretorio = diretorio
+        self.metodos = tuple(metodos)
+        self.restantes = chamadas
+        self.capturadas = 0
+        self.arquivos: List[str] = []
+        self.locais_alocacao = locais_alocacao
+        self.quadros_alocacao = quadros_alocacao
+        self._capturando = False
+        self._trava = threading.Lock()
+
+        for nome in self.metodos:
+            setattr(alvo, nome, self._envolver(nome, getattr(alvo, nome)))
+
+    @property
+    def ativa(self) -> bool:
+        return self.restantes > 0
+
+    def desativar(self) -> None:
+        """Cancela as capturas restantes e restaura os métodos originais."""
+        with self._trava:
+            self.restantes = 0
+            self._restaurar()
+
+    def _restaurar(self) -> None:
+        for nome in self.metodos:
+            vars(self.alvo).pop(nome, None)
+
+    def _envolver(self, nome: str, original: Callable) -> Callable:
+        @functools.wraps(original)
+        def capturar(*args, **kwargs):
+            with self._trava:
+                # chamadas aninhadas ou concorrentes seguem sem captura
+                if self._capturando or self.restantes <= 0:
+                    indice = None
+                else:
+                    self._capturando = True
+                    self.restantes -= 1
+                    self.capturadas += 1
+                    indice = self.capturadas
+                    if self.restantes == 0:
+                        self._restaurar()
+            if indice is None:
+                return original(*args, **kwargs)
+
+            try:
+                return self._executar(nome, indice, original, args, kwargs)
+            finally:
+                with self._trava:
+                    self._capturando = False
+
+        return capturar
+
+    def _executar(self, nome: str, indice: int, original: Callable, args, kwargs):
+        ja_rastreando = tracemalloc.is_tracing()
+        if ja_rastreando:
+            antes: Optional[tracemalloc.Snapshot] = tracemalloc.take_snapshot()
+        else:
+            antes = None
+            tracemalloc.start(self.quadros_alocacao)
+        tracemalloc.reset_peak()
+
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            perfil.disable()
+            depois = tracemalloc.take_snapshot()
+            _, pico = tracemalloc.get_traced_memory()
+            if not ja_rastreando:
+                tracemalloc.stop()
+            self._gravar(f"{nome}-{indice:03d}", perfil, antes, depois, pico)
+
+    def _gravar(self, prefixo: str, perfil: cProfile.Profile, antes: Optional[tracemalloc.Snapshot],
+                depois: tracemalloc.Snapshot, pico: int) -> None:
+        base = os.path.join(self.diretorio, prefixo)
+
+        perfil.dump_stats(f"{base}.prof")
+        estatisticas = pstats.Stats(perfil)
+        with open(f"{base}.folded", "w", encoding="utf-8") as arquivo:
+            for pilha, segundos in sorted(pilhas_colapsadas(estatisticas).items()):
+                microssegundos = round(segundos * 1_000_000)
+                if microssegundos > 0:
+                    arquivo.write(f"{pilha} {microssegundos}\n")
+
+        filtros = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        depois = depois.filter_traces(filtros)
+        if antes is not None:
+            locais = depois.compare_to(antes.filter_traces(filtros), "lineno")
+        else:
+            locais = depois.statistics("lineno")
+        with open(f"{base}-alocacoes.txt", "w", encoding="utf-8") as arquivo:
+            arquivo.write(f"Pico de memória rastreada: {pico / 1024:.1f} KiB\n")
+            arquivo.write(f"Tempo total: {estatisticas.total_tt:.4f}s\n\n")
+            for local in locais[:self.locais_alocacao]:
+                arquivo.write(f"{local}\n")
+
+        self.arquivos.extend([f"{base}.prof", f"{base}.folded", f"{base}-alocacoes.txt"])
+        print(f"Perfil de {prefixo} gravado em {self.diretorio}")
+
+
+def capturar_perfil(alvo: object, diretorio: str = "perfis", chamadas: int = 1,
+                    metodos: Sequence[str] = METODOS_PERFILAVEIS) -> CapturaPerfil:
+    """Ativa a captura de perfil das próximas `chamadas` chamadas aos métodos do alvo."""
+    return CapturaPerfil(alvo, diretorio, chamadas, metodos)
@@ -0,0 +1,52 @@
+import time
+import threading
+from collections import deque
+from typing import Callable, Deque, List
+
+
+class RegistroCircular:
+    """
+    Log de eventos com buffer circular limitado, para acompanhar o consenso em tempo real.
+    As mensagens são acumuladas e entregues ao renderizador em quadros de no máximo
+    `quadros_por_segundo` por segundo, e cada quadro contém apenas as linhas novas
+    desde o anterior, então o custo total de renderização é linear no número de mensagens.
+    """
+
+    def __init__(self, renderizar: Callable[[List[str]], None], capacidade: int = 500,
+                 quadros_por_segundo: float = 10.0) -> None:
+        if capacidade < 1:
+            raise ValueError("A capacidade do registro deve ser positiva")
+        if quadros_por_segundo <= 0:
+            raise ValueError("A taxa de quadros deve ser positiva")
+        self.renderizar = renderizar
+        self.linhas: Deque[str] = deque(maxlen=capacidade)
+        self.total = 0
+        self.descartadas = 0
+        self._renderizadas = 0
+        self._intervalo = 1.0 / quadros_por_segundo
+        self._ultimo_quadro = float("-inf")
+        self._trava = threading.Lock()
+
+    def __call__(self, mensagem: str) -> None:
+        """Registra uma mensagem; pode ser passado diretamente como `log_callback`."""
+        with self._trava:
+            self.linhas.append(mensagem)
+            self.total += 1
+            if time.monotonic() - self._ultimo_quadro < self._intervalo:
+                return
+        self.descarregar()
+
+    def descarregar(self) -> None:
+        """Entrega ao renderizador as linhas ainda não exibidas, independentemente da taxa de quadros."""
+        with self._trava:
+            novas = self.total - self._renderizadas
+            if novas == 0:
+                return
+            if novas > len(self.linhas):
+                # linhas que saíram do buffer antes de serem exibidas
+                self.descartadas += novas - len(self.linhas)
+                novas = len(self.linhas)
+            linhas = [self.linhas[i] for i in range(len(self.linhas) - novas, len(self.linhas))]
+            self._renderizadas = self.total
+            self._ultimo_quadro = time.monotonic()
+        self.renderizar(linhas)
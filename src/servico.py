@@ -0,0 +1,305 @@
+"""
+Serviço local assíncrono (HTTP/JSON) para submissão de transações assinadas.
+
+Rotas:
+- POST /transacoes: recebe uma transação no formato de `Transacao.para_dict`
+  e responde quando ela é minerada ou rejeitada, informando a latência.
+- GET /metricas: latências observadas, tamanho da fila e lotes minerados.
+
+Uso para teste de carga: python -m src.servico [usuarios] [transacoes] [concorrencia]
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+from collections import deque
+from src.usuario import Usuario
+from src.transacao import Transacao
+from src.blockchain import Blockchain
+from typing import Deque, Dict, List, Optional, Tuple
+
+TAMANHO_MAXIMO_CORPO = 64 * 1024
+
+_MENSAGENS_STATUS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    409: "Conflict",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Retorna o percentil p (0 a 100) dos valores, pelo método do vizinho mais próximo."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+class LimitadorTaxa:
+    """
+    Limitador de taxa por cliente no modelo de balde de fichas:
+    cada cliente acumula até `rajada` fichas, repostas a `taxa` por segundo.
+    """
+
+    def __init__(self, taxa: float, rajada: int) -> None:
+        self.taxa = taxa
+        self.rajada = rajada
+        self._baldes: Dict[str, Tuple[float, float]] = {}
+
+    def permitir(self, cliente: str) -> bool:
+        agora = time.monotonic()
+        fichas, ultimo = self._baldes.get(cliente, (float(self.rajada), agora))
+        fichas = min(float(self.rajada), fichas + (agora - ultimo) * self.taxa)
+        if fichas < 1.0:
+            self._baldes[cliente] = (fichas, agora)
+            return False
+        self._baldes[cliente] = (fichas - 1.0, agora)
+        return True
+
+
+class ServicoTransacoes:
+    """
+    Serviço que aceita transações concorrentemente e as agrupa em lotes de mineração.
+    A fila é limitada: quando está cheia, novas submissões recebem 503 (backpressure).
+    Um lote é fechado quando atinge `tamanho_lote` transações ou quando a janela
+    de `janela_segundos` desde a primeira transação do lote termina.
+    """
+
+    def __init__(self, blockchain: Blockchain, host: str = "127.0.0.1", porta: int = 8765,
+                 tamanho_fila: int = 1000, tamanho_lote: int = 32, janela_segundos: float = 0.5,
+                 taxa_por_cliente: float = 50.0, rajada_por_cliente: int = 100) -> None:
+        self.blockchain = blockchain
+        self.host = host
+        self.porta = porta
+        self.tamanho_lote = tamanho_lote
+        self.janela_segundos = janela_segundos
+        self.limitador = LimitadorTaxa(taxa_por_cliente, rajada_por_cliente)
+
+        self._fila: "asyncio.Queue[Tuple[Transacao, asyncio.Future, float]]" = asyncio.Queue(tamanho_fila)
+        self._servidor: Optional[asyncio.AbstractServer] = None
+        self._minerador: Optional[asyncio.Task] = None
+
+        self.latencias: Deque[float] = deque(maxlen=10_000)
+        self.lotes_minerados = 0
+        self.rejeitadas = 0
+
+    async def iniciar(self) -> None:
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.porta)
+        self.porta = self._servidor.sockets[0].getsockname()[1]
+        self._minerador = asyncio.create_task(self._minerar_lotes())
+
+    async def encerrar(self) -> None:
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        if self._minerador is not None:
+            self._minerador.cancel()
+            try:
+                await self._minerador
+            except asyncio.CancelledError:
+                pass
+
+    def metricas(self) -> dict:
+        latencias = list(self.latencias)
+        return {
+            "processadas": len(latencias),
+            "rejeitadas": self.rejeitadas,
+            "lotes_minerados": self.lotes_minerados,
+            "fila": self._fila.qsize(),
+            "latencia_p50_ms": percentil(latencias, 50) * 1000,
+            "latencia_p95_ms": percentil(latencias, 95) * 1000,
+            "latencia_max_ms": max(latencias, default=0.0) * 1000,
+        }
+
+    async def _atender(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        inicio = time.perf_counter()
+        try:
+            status, resposta = await self._processar(leitor, escritor, inicio)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            escritor.close()
+            return
+
+        resposta["latencia_ms"] = (time.perf_counter() - inicio) * 1000
+        corpo = json.dumps(resposta).encode("utf-8")
+        escritor.write(
+            f"HTTP/1.1 {status} {_MENSAGENS_STATUS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            f"Connection: close\r\n\r\n".encode("utf-8") + corpo
+        )
+        try:
+            await escritor.drain()
+        finally:
+            escritor.close()
+
+    async def _processar(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter,
+                         inicio: float) -> Tuple[int, dict]:
+        cabecalho = (await leitor.readuntil(b"\r\n\r\n")).decode("latin-1")
+        linhas = cabecalho.split("\r\n")
+        partes = linhas[0].split(" ")
+        if len(partes) != 3:
+            return 400, {"erro": "Requisição malformada"}
+        metodo, caminho, _ = partes
+
+        if metodo == "GET" and caminho == "/metricas":
+            return 200, self.metricas()
+        if metodo != "POST" or caminho != "/transacoes":
+            return 404, {"erro": "Rota não encontrada"}
+
+        tamanho = 0
+        for linha in linhas[1:]:
+            if linha.lower().startswith("content-length:"):
+                try:
+                    tamanho = int(linha.split(":", 1)[1])
+                except ValueError:
+                    return 400, {"erro": "Content-Length inválido"}
+        if tamanho < 0:
+            return 400, {"erro": "Content-Length inválido"}
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            return 413, {"erro": "Corpo da requisição muito grande"}
+
+        cliente = escritor.get_extra_info("peername", ("?", 0))[0]
+        if not self.limitador.permitir(cliente):
+            return 429, {"erro": "Limite de requisições excedido"}
+
+        try:
+            transacao = Transacao.de_dict(json.loads(await leitor.readexactly(tamanho)))
+        except (ValueError, KeyError, TypeError):
+            return 400, {"erro": "Transação inválida"}
+
+        loop = asyncio.get_running_loop()
+        admitida, motivo = await loop.run_in_executor(None, self.blockchain.admitir_transacao, transacao)
+        if not admitida:
+            self.rejeitadas += 1
+            return 409, {"erro": motivo}
+
+        futuro = loop.create_future()
+        try:
+            self._fila.put_nowait((transacao, futuro, inicio))
+        except asyncio.QueueFull:
+            self.blockchain.remover_pendente(transacao.id)
+            return 503, {"erro": "Fila de mineração cheia, tente novamente"}
+
+        return await futuro
+
+    async def _minerar_lotes(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._fila.get()]
+            limite = loop.time() + self.janela_segundos
+            while len(lote) < self.tamanho_lote:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._fila.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                resultados = await loop.run_in_executor(None, self._minerar, [t for t, _, _ in lote])
+            except Exception as erro:
+                # uma falha inesperada responde ao lote inteiro, sem derrubar o laço de mineração
+                print(f"ERRO: Falha ao minerar o lote: {erro!r}")
+                for transacao, _, _ in lote:
+                    self.blockchain.remover_pendente(transacao.id)
+                resultados = [(500, {"erro": "Falha interna ao minerar o lote"})] * len(lote)
+            self.lotes_minerados += 1
+
+            for (_, futuro, inicio), (status, resposta) in zip(lote, resultados):
+                self.latencias.append(time.perf_counter() - inicio)
+                if status != 200:
+                    self.rejeitadas += 1
+                if not futuro.done():
+                    futuro.set_result((status, resposta))
+
+    def _minerar(self, transacoes: List[Transacao]) -> List[Tuple[int, dict]]:
+        """
+        Minera as transações do lote em ordem, um bloco por transação.
+        Cada bloco é proposto pelo próprio remetente, cuja chave assina a transação.
+        Erros ao minerar uma transação são respondidos com 500 apenas para ela.
+        """
+        resultados = []
+        for transacao in transacoes:
+            remetente = self.blockchain.usuarios_por_id.get(transacao.remetente)
+            try:
+                bloco = remetente.minerar_bloco(transacao) if remetente else None
+            except Exception as erro:
+                print(f"ERRO: Falha ao minerar a transação {transacao.id}: {erro!r}")
+                self.blockchain.remover_pendente(transacao.id)
+                resultados.append((500, {"erro": "Falha interna ao minerar a transação"}))
+                continue
+            if bloco is None:
+                self.blockchain.remover_pendente(transacao.id)
+                resultados.append((409, {"erro": "Bloco rejeitado pela rede"}))
+            else:
+                resultados.append((200, {"bloco": str(bloco.id), "altura": len(self.blockchain.cadeia) - 1}))
+        return resultados
+
+
+async def enviar_transacao(host: str, porta: int, transacao: Transacao) -> Tuple[int, float]:
+    """Envia uma transação ao serviço e retorna o status HTTP e a latência em segundos."""
+    inicio = time.perf_counter()
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    corpo = json.dumps(transacao.para_dict()).encode("utf-8")
+    escritor.write(
+        f"POST /transacoes HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(corpo)}\r\n\r\n".encode("utf-8") + corpo
+    )
+    await escritor.drain()
+    linha_status = await leitor.readline()
+    await leitor.read()
+    escritor.close()
+    return int(linha_status.split(b" ")[1]), time.perf_counter() - inicio
+
+
+async def gerar_carga(host: str, porta: int, transacoes: List[Transacao],
+                      concorrencia: int = 16) -> List[Tuple[int, float]]:
+    """
+    Cliente de teste de carga: envia as transações com no máximo
+    `concorrencia` requisições simultâneas e retorna status e latência de cada uma.
+    """
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    async def enviar(transacao: Transacao) -> Tuple[int, float]:
+        async with semaforo:
+            return await enviar_transacao(host, porta, transacao)
+
+    return await asyncio.gather(*(enviar(transacao) for transacao in transacoes))
+
+
+async def _demonstracao(quantidade_usuarios: int, quantidade_transacoes: int, concorrencia: int) -> None:
+    blockchain = Blockchain()
+    usuarios = [Usuario(f"Usuário {i}", blockchain, 1000.0) for i in range(quantidade_usuarios)]
+
+    transacoes = []
+    for _ in range(quantidade_transacoes):
+        remetente, destinatario = random.sample(usuarios, 2)
+        transacoes.append(remetente.criar_transacao(destinatario.id, round(random.uniform(1, 10), 2)))
+
+    servico = ServicoTransacoes(blockchain, porta=0)
+    await servico.iniciar()
+    try:
+        inicio = time.perf_counter()
+        resultados = await gerar_carga(servico.host, servico.porta, transacoes, concorrencia)
+        duracao = time.perf_counter() - inicio
+    finally:
+        await servico.encerrar()
+
+    latencias = [latencia for _, latencia in resultados]
+    aceitas = sum(1 for status, _ in resultados if status == 200)
+    print(f"{aceitas}/{len(resultados)} transações mineradas em {duracao:.2f}s")
+    print(f"Latência p50: {percentil(latencias, 50) * 1000:.0f} ms | p95: {percentil(latencias, 95) * 1000:.0f} ms")
+    print(f"Métricas do serviço: {servico.metricas()}")
+
+
+if __name__ == "__main__":
+    argumentos = [int(a) for a in sys.argv[1:4]]
+    asyncio.run(_demonstracao(*(argumentos + [4, 20, 8][len(argumentos):])))
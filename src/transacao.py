@@ -1,27 +1,105 @@
 import hashlib
+from typing import Dict
 from uuid import uuid4, UUID
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import padding
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey, RSAPrivateKey
 
+# IDs de participantes se repetem em muitas transações e blocos,
+# então uma única cópia dos 16 bytes é compartilhada por todos eles
+_IDS_INTERNADOS: Dict[bytes, bytes] = {}
+
+
+def internar_id(valor: UUID) -> bytes:
+    """Retorna os 16 bytes do UUID, compartilhando a mesma cópia entre objetos."""
+    dado = valor.bytes
+    return _IDS_INTERNADOS.setdefault(dado, dado)
+
 
 class Transacao:
     """
-    Classe que representa uma transação
+    Classe que representa uma transação.
+    Os IDs são guardados como 16 bytes e a transação se torna imutável após ser assinada.
     """
+    __slots__ = ("_remetente", "_destinatario", "pontos", "_id", "assinatura", "hash")
+
     def __init__(self, remetente: UUID, destinatario: UUID, pontos: float) -> None:
         self.remetente = remetente
         self.destinatario = destinatario
         self.pontos = pontos
-        self.id = uuid4()
+        self._id = uuid4().bytes
 
         self.assinatura = None
         self.hash = None
 
+    def __setattr__(self, nome: str, valor) -> None:
+        if getattr(self, "assinatura", None) is not None:
+            raise AttributeError("Transação assinada não pode ser alterada")
+        object.__setattr__(self, nome, valor)
+
+    def __getstate__(self) -> dict:
+        return {nome: getattr(self, nome) for nome in self.__slots__ if hasattr(self, nome)}
+
+    def __setstate__(self, estado: dict) -> None:
+        # ignora a imutabilidade, pois o objeto está sendo reconstruído já assinado
+        for nome, valor in estado.items():
+            object.__setattr__(self, nome, valor)
+
+    @property
+    def remetente(self) -> UUID:
+        return UUID(bytes=self._remetente)
+
+    @remetente.setter
+    def remetente(self, valor: UUID) -> None:
+        self._remetente = internar_id(valor)
+
+    @property
+    def destinatario(self) -> UUID:
+        return UUID(bytes=self._destinatario)
+
+    @destinatario.setter
+    def destinatario(self, valor: UUID) -> None:
+        self._destinatario = internar_id(valor)
+
+    @property
+    def id(self) -> UUID:
+        return UUID(bytes=self._id)
+
+    @id.setter
+    def id(self, valor: UUID) -> None:
+        self._id = valor.bytes
+
+    def para_dict(self) -> dict:
+        """Representação JSON da transação, com bytes em hexadecimal."""
+        return {
+            "id": str(self.id),
+            "remetente": str(self.remetente),
+            "destinatario": str(self.destinatario),
+            "pontos": self.pontos,
+            "hash": self.hash.hex() if self.hash else None,
+            "assinatura": self.assinatura.hex() if self.assinatura else None,
+        }
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "Transacao":
+        """
+        Reconstrói uma transação a partir de `para_dict`.
+        A assinatura é atribuída por último, tornando a transação imutável.
+        """
+        transacao = cls(
+            remetente=UUID(dados["remetente"]),
+            destinatario=UUID(dados["destinatario"]),
+            pontos=float(dados["pontos"]),
+        )
+        transacao.id = UUID(dados["id"])
+        transacao.hash = bytes.fromhex(dados["hash"]) if dados.get("hash") else None
+        transacao.assinatura = bytes.fromhex(dados["assinatura"]) if dados.get("assinatura") else None
+        return transacao
+
     def calcular_hash(self) -> bytes:
         digest = hashlib.sha256()
-        digest.update(self.remetente.bytes)
-        digest.update(self.destinatario.bytes)
+        digest.update(self._remetente)
+        digest.update(self._destinatario)
         digest.update(str(self.pontos).encode('utf-8'))
         digest.update(str(self.id).encode('utf-8'))
         return digest.digest()
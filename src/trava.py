@@ -0,0 +1,94 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class TravaLeituraEscrita:
+    """
+    Trava de leitura/escrita com preferência para escritores.
+    Vários leitores podem ler ao mesmo tempo sem se bloquear, enquanto cada
+    escritor tem acesso exclusivo. Quando há um escritor esperando, novos
+    leitores aguardam, para que as escritas não fiquem paradas indefinidamente.
+    A mesma thread pode adquirir a trava de forma aninhada (leitura dentro de
+    leitura, ou qualquer uma dentro de escrita), mas não pode promover uma
+    leitura a escrita.
+    """
+
+    def __init__(self) -> None:
+        self._condicao = threading.Condition(threading.Lock())
+        self._leitores = 0
+        self._escritor = None
+        self._profundidade_escrita = 0
+        self._escritores_esperando = 0
+        self._local = threading.local()
+
+    def _leituras_da_thread(self) -> int:
+        return getattr(self._local, "leituras", 0)
+
+    def adquirir_leitura(self) -> None:
+        eu = threading.get_ident()
+        with self._condicao:
+            if self._escritor == eu or self._leituras_da_thread() > 0:
+                # reentrada: a thread já tem acesso à cadeia
+                self._local.leituras = self._leituras_da_thread() + 1
+                if self._escritor != eu:
+                    self._leitores += 1
+                return
+            while self._escritor is not None or self._escritores_esperando > 0:
+                self._condicao.wait()
+            self._leitores += 1
+            self._local.leituras = 1
+
+    def liberar_leitura(self) -> None:
+        eu = threading.get_ident()
+        with self._condicao:
+            self._local.leituras = self._leituras_da_thread() - 1
+            if self._escritor == eu:
+                return
+            self._leitores -= 1
+            if self._leitores == 0:
+                self._condicao.notify_all()
+
+    def adquirir_escrita(self) -> None:
+        eu = threading.get_ident()
+        with self._condicao:
+            if self._escritor == eu:
+                self._profundidade_escrita += 1
+                return
+            if self._leituras_da_thread() > 0:
+                raise RuntimeError("Não é possível adquirir escrita enquanto a thread mantém uma leitura")
+            self._escritores_esperando += 1
+            try:
+                while self._escritor is not None or self._leitores > 0:
+                    self._condicao.wait()
+            finally:
+                self._escritores_esperando -= 1
+            self._escritor = eu
+            self._profundidade_escrita = 1
+
+    def liberar_escrita(self) -> None:
+        with self._condicao:
+            if self._escritor != threading.get_ident():
+                raise RuntimeError("A trava de escrita não pertence a esta thread")
+            self._profundidade_escrita -= 1
+            if self._profundidade_escrita == 0:
+                self._escritor = None
+                self._condicao.notify_all()
+
+    @contextmanager
+    def leitura(self) -> Iterator[None]:
+        """Contexto de leitura compartilhada."""
+        self.adquirir_leitura()
+        try:
+            yield
+        finally:
+            self.liberar_leitura()
+
+    @contextmanager
+    def escrita(self) -> Iterator[None]:
+        """Contexto de escrita exclusiva."""
+        self.adquirir_escrita()
+        try:
+            yield
+        finally:
+            self.liberar_escrita()
@@ -1,10 +1,14 @@
 import time
 import random
 from src.bloco import Bloco
-from typing import Optional
+from typing import List, Optional, Tuple
 from uuid import uuid4, UUID
 from src.transacao import Transacao
+from src.certificado import Voto, digest_eleitorado
+from src.livro_saldos import valor_valido
 from src.blockchain import Blockchain
+from src.estado import GerenciadorSnapshots
+from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey, RSAPrivateKey
 
@@ -14,19 +18,48 @@ class Usuario:
     Classe que representa um usário na blockchain.
     """
 
-    def __init__(self, nome: str, blockchain: Blockchain, pontos: float) -> None:
-        self.id = uuid4()
+    def __init__(self, nome: str, blockchain: Blockchain, pontos: float,
+                 chave_privada: Optional[RSAPrivateKey] = None,
+                 usuario_id: Optional[UUID] = None) -> None:
+        # um ID informado recria um usuário já conhecido pela cadeia
+        self.id = usuario_id if usuario_id is not None else uuid4()
         self.nome = nome
         self.blockchain = blockchain
         self.pontos = pontos
 
-        self.chave_privada: RSAPrivateKey = rsa.generate_private_key(
-            public_exponent=65537, key_size=2048
-        )
+        if chave_privada is None:
+            chave_privada = rsa.generate_private_key(
+                public_exponent=65537, key_size=2048
+            )
+        self.chave_privada: RSAPrivateKey = chave_privada
         self.chave_publica: RSAPublicKey = self.chave_privada.public_key()
 
         self.blockchain.registrar_usuario(self)
 
+    def para_dict(self) -> dict:
+        """Retorna o ID, o nome e a chave privada em PEM, para recriar o usuário."""
+        chave = self.chave_privada.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        return {"id": str(self.id), "nome": self.nome, "chave_privada": chave.decode("ascii")}
+
+    @classmethod
+    def de_dict(cls, dados: dict, blockchain: Blockchain) -> "Usuario":
+        """Recria o usuário com o mesmo ID e a mesma chave, registrando-o com o saldo em `pontos`."""
+        chave = serialization.load_pem_private_key(dados["chave_privada"].encode("ascii"), password=None)
+        return cls(dados["nome"], blockchain, dados["pontos"], chave, UUID(dados["id"]))
+
+    @property
+    def pontos(self) -> float:
+        """Saldo do usuário, lido do livro de saldos da blockchain."""
+        return self.blockchain.livro.saldo(self.id)
+
+    @pontos.setter
+    def pontos(self, valor: float) -> None:
+        self.blockchain.livro.definir(self.id, valor)
+
     def criar_transacao(self, destinatario_id: UUID, pontos: float) -> Transacao:
         """
         Cria uma nova transação e a assina com a chave privada do usuário.
@@ -54,8 +87,24 @@ class Usuario:
             log_callback(f"{self.nome} está minerando um novo bloco...")
 
         bloco = Bloco(
-            transacao=transacao, hash_anterior=hash_anterior, minerador=self.id
+            transacao=transacao,
+            hash_anterior=hash_anterior,
+            minerador=self.id,
+            raiz_mmr=self.blockchain.mmr.raiz(),
         )
+
+        dificuldade = self.blockchain.dificuldade
+        if dificuldade > 0:
+            bloco.dificuldade = dificuldade
+            resultado = self.blockchain.mineracao.buscar(bloco.cabecalho(), dificuldade)
+            bloco.nonce = resultado.nonce
+            taxas = ", ".join(f"{taxa / 1000:.0f}" for taxa in resultado.taxa_por_nucleo)
+            mensagem = (f"Prova de trabalho encontrada (nonce {resultado.nonce}, {sum(resultado.tentativas)} hashes): "
+                        f"{resultado.taxa_total / 1000:.0f} kH/s no total, por núcleo [{taxas}] kH/s")
+            print(mensagem)
+            if log_callback:
+                log_callback(mensagem)
+
         bloco.assinar(self.chave_privada)
 
         if log_callback:
@@ -70,23 +119,77 @@ class Usuario:
                 log_callback(f"Falha ao adicionar bloco à blockchain!")
             return None
 
+    def votar(self, bloco: Bloco) -> Voto:
+        """
+        Analisa o bloco e retorna a decisão como um voto assinado.
+        """
+        decisao, motivo = self.consentir(bloco)
+        voto = Voto(
+            eleitor=self.id,
+            hash_bloco=bloco.hash,
+            eleitorado=digest_eleitorado(self.blockchain.eleitores(bloco.minerador)),
+            decisao=decisao,
+            motivo=motivo,
+        )
+        voto.assinar(self.chave_privada)
+        return voto
+
     def consentir(self, bloco: Bloco) -> tuple[bool, str]:
         #Retorna uma tupla: caso ocorra algum erro, False e o motivo do erro, caso nao, True e mensagem de sucesso
         time.sleep(random.uniform(0.5, 1))
         if random.random() < 0.1: #Simula decisao maliciosa
             return False, "Decisão aleatória de não consentir"
+        if not bloco.prova_trabalho_valida(self.blockchain.dificuldade): #Verifica a prova de trabalho antes das assinaturas
+            return False, "Prova de trabalho inválida"
         if bloco.hash_anterior != self.blockchain.ultimo_bloco().hash:
             return False, "Hash anterior inválido" #Verifica hash anterior
+        if bloco.raiz_mmr != self.blockchain.mmr.raiz(): #Verifica o compromisso com a raiz do MMR da cadeia
+            return False, "Raiz MMR inválida"
+        if self.blockchain.transacoes_vistas.contem(bloco.transacao): #Impede que uma transação seja minerada novamente
+            return False, "Transação já registrada na cadeia"
         if bloco.transacao.remetente not in self.blockchain.usuarios_por_id or bloco.transacao.destinatario not in self.blockchain.usuarios_por_id:
             return False, "Algum participante da transação está banido da blockchain"
         chave_minerador = self.blockchain.get_chave(bloco.minerador)
         chave_emitente = self.blockchain.get_chave(bloco.transacao.remetente)
         if not chave_minerador or not bloco.validar(chave_minerador) or not bloco.validar(chave_emitente): #Verifica assinaturas
             return False, "Validação criptográfica falhou"
-        if bloco.transacao.pontos <= 0: #Verifica se foi passado um valor invalido
+        if not valor_valido(bloco.transacao.pontos): #Verifica se foi passado um valor invalido, inclusive abaixo da precisão do livro
             return False, "Valor da transação inválido"
         if bloco.transacao.remetente == UUID(int=0): #Aprova bloco genesis
             return True, "Transação gênesis aprovada"
         if not self.blockchain.compare_pontos(bloco.transacao.remetente, bloco.transacao.pontos): #Verifica se remetente tem saldo suficiente
             return False, "Saldo insuficiente do remetente"
         return True, "Bloco válido e aprovado"
+
+
+def carregar_usuarios(blockchain: Blockchain) -> List[Usuario]:
+    """
+    Recria os usuários gravados no registro de uma cadeia em arquivo, com seus
+    saldos iniciais, e volta a banir os que estavam banidos na altura atual.
+    Os saldos atuais são restaurados depois com `blockchain.restaurar_saldos`.
+    """
+    if blockchain.registro_usuarios is None:
+        raise ValueError("A blockchain não tem registro de usuários em arquivo")
+    possui_eleitorado = len(blockchain.eleitorado) > 0
+    ativos = blockchain.eleitorado.em(len(blockchain.cadeia))
+    usuarios = [Usuario.de_dict(dados, blockchain) for dados in blockchain.registro_usuarios.registros()]
+    if possui_eleitorado:
+        for usuario in usuarios:
+            if usuario.id not in ativos:
+                blockchain.banir(usuario.id)
+    return usuarios
+
+
+def abrir_rede(arquivo_cadeia: str, snapshots: Optional[GerenciadorSnapshots] = None,
+               **opcoes) -> Tuple[Blockchain, List[Usuario]]:
+    """
+    Reabre uma cadeia em arquivo com os seus usuários: recria os usuários
+    registrados, carrega o snapshot mais recente compatível com a cadeia e
+    reproduz apenas os blocos posteriores a ele (ou a cadeia inteira, sem snapshots).
+    As demais opções são repassadas ao construtor da blockchain.
+    """
+    blockchain = Blockchain(snapshots=snapshots, arquivo_cadeia=arquivo_cadeia, **opcoes)
+    usuarios = carregar_usuarios(blockchain)
+    reproduzidos = blockchain.restaurar_saldos()
+    print(f"Rede reaberta com {len(usuarios)} usuários e {reproduzidos} blocos reproduzidos.")
+    return blockchain, usuarios